@@ -7,15 +7,30 @@ Bulk download videos from ThisVid
 __version__ = "2.1.1"
 
 import os
+import io
 import sys
 import csv
 import json
 import time
+import sqlite3
 import re
+import html
+import random
+import hashlib
+import asyncio
+import threading
 import requests
 import subprocess
+import multiprocessing
+import tempfile
+import queue
+import itertools
+import concurrent.futures
 from pathlib import Path
+from collections import deque
 from datetime import datetime
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit, parse_qs
 
 try:
     from bs4 import BeautifulSoup
@@ -24,16 +39,74 @@ except ImportError:
     subprocess.run([sys.executable, "-m", "pip", "install", "beautifulsoup4", "-q"])
     from bs4 import BeautifulSoup
 
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # SETTINGS
 # ═══════════════════════════════════════════════════════════════════════════════
 
-SCRAPE_DELAY = 0.3
 REQUEST_TIMEOUT = 30
-AVG_DOWNLOAD_TIME = 10
+RATE_START = 3.0          # listing requests/sec at start-up
+RATE_MIN = 0.2            # floor the limiter backs off to
+RATE_MAX = 20.0           # ceiling the limiter ramps up to
+RATE_STEP = 0.1           # req/sec added per healthy response
+SLOW_RESPONSE = 3.0       # seconds; slower responses stop the ramp-up
+SCRAPE_RETRIES = 3        # extra attempts for a listing page that fails
+RETRY_BACKOFF = 1.0       # seconds before the first retry, doubled after each
+LINK_EXTRACTOR = "scan"   # scan | lxml | bs4 | verify
+STREAM_PAGES = True       # parse listing pages while they download (scan only)
+STREAM_CHUNK = 16 * 1024
+SCAN_CONCURRENCY = 8      # listing pages in flight at once
+SCAN_CONNECTIONS = 8      # pooled keep-alive connections per host
+AVG_DOWNLOAD_TIME = 10    # seconds per video, until downloads have been timed
+ETA_SMOOTHING = 0.2       # weight of each new video in the ETA's moving averages
+DOWNLOAD_BACKEND = "inprocess"  # inprocess (yt_dlp module) | subprocess (yt-dlp command)
+DOWNLOAD_WORKERS = 4          # videos downloading at once (starting point if adaptive)
+ADAPTIVE_WORKERS = True       # add/shed download workers based on measured throughput
+DOWNLOAD_WORKERS_MAX = 12
+ADJUST_INTERVAL = 20          # seconds between worker-count adjustments
+BANDWIDTH_CAP = None          # bytes/sec across all downloads, None for no cap
+SEGMENTED_DOWNLOADS = False   # fetch large files over several ranged connections
+SEGMENTS = 4                  # connections per segmented download
+SEGMENT_MIN_SIZE = 16 * 1024 * 1024  # smaller files aren't worth splitting
+PIPELINE = True               # start downloading while pages are still being scanned
+PIPELINE_QUEUE_SIZE = 200     # found-but-not-started videos before scanning pauses
+DOWNLOAD_ORDER = "found"      # found | smallest | newest | most_viewed | round_robin
 
 STATUS_FILE = "download_status.csv"
 SESSION_FILE = "session.json"
+SCAN_FILE = "scan_pages.jsonl" # links of each page scanned so far, so resume skips them
+PARTIAL_DIR = ".partial"      # per-video resume records, beside the status file
+PARTIAL_SAVE_INTERVAL = 5     # seconds between progress writes for one video
+STALL_TIMEOUT = 120           # give up on a download after this long without new bytes
+STATUS_FSYNC = "interval"     # commit: fsync every write | interval | off: leave it to the OS
+STATUS_FSYNC_INTERVAL = 1.0   # seconds between fsyncs under "interval"
+STATUS_COMPACT_RATIO = 3      # compact the status journal at this many rows per video
+STATUS_COMPACT_MIN_ROWS = 1000
+DOWNLOAD_ATTEMPTS = 4         # tries before a failing video is parked for good
+DOWNLOAD_RETRY_DELAY = 30     # seconds before the first retry; doubles with each attempt
+
+CONFIG_DIR = Path.home() / ".sirsthisvid"
+LAST_PAGE_CACHE = CONFIG_DIR / "last_pages.json"
+ETA_FILE = CONFIG_DIR / "eta.json"
+LAST_PAGE_TTL = 6 * 3600      # seconds a probed page count stays trusted
+PROBE_LAST_PAGE = True        # gallop past the pager to find the real last page
+MAX_PROBE_PAGE = 100000
+DELTA_STOP_PAGES = 3          # quick update stops after this many fully-known pages
+PAGE_CACHE_FILE = CONFIG_DIR / "page_cache.json"
+CATALOG_FILE = CONFIG_DIR / "catalog.db"
+EXTRACTION_TTL = 3600         # seconds a resolved media URL is trusted if it has no expiry of its own
+PAGE_CACHE_TTL = 15 * 60      # seconds cached links are used without asking the server
+PAGE_CACHE_MAX_ENTRIES = 5000 # least recently used pages are evicted past this
 
 HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
 GITHUB_REPO = "sdc88/Sirs-ThisVid-Ripper"
@@ -53,13 +126,14 @@ def header():
     print("═" * 55)
     print()
 
-def progress_bar(current, total, prefix=""):
+def progress_bar(current, total, prefix="", eta=None):
     if total == 0:
         return
     pct = current / total
     filled = int(30 * pct)
     bar = "█" * filled + "░" * (30 - filled)
-    print(f"\r  {prefix} [{bar}] {current}/{total} ({pct*100:.0f}%)", end="", flush=True)
+    left = f"  ⏱️  ~{format_time(eta)} left   " if eta is not None else ""
+    print(f"\r  {prefix} [{bar}] {current}/{total} ({pct*100:.0f}%){left}", end="", flush=True)
 
 def format_time(seconds):
     if seconds < 60:
@@ -70,6 +144,12 @@ def format_time(seconds):
         hours = seconds / 3600
         return f"{hours:.1f} hours"
 
+def format_bytes(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.1f} {unit}" if unit != "B" else f"{int(n)} B"
+        n /= 1024
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # UPDATE CHECKER
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -81,7 +161,7 @@ def check_for_updates():
     
     try:
         url = f"https://api.github.com/repos/{GITHUB_REPO}/releases/latest"
-        response = requests.get(url, timeout=10)
+        response = get_session().get(url, timeout=10)
         
         if response.status_code == 404:
             print("  ℹ️  No releases found yet.")
@@ -130,112 +210,1292 @@ def build_all_videos_url(orientation, page):
         return f"https://thisvid.com/{base}/"
     return f"https://thisvid.com/{base}/{page}/"
 
+def source_url_builder(mode, source):
+    """Page URL builder for a listing, from the parameters saved with its session."""
+    if mode == 'tag':
+        return lambda p: build_tag_url(source['tag'], source['orientation'], source['sort'], p)
+    if mode == 'profile':
+        return lambda p: build_profile_url(source['member_id'], p)
+    if mode == 'all':
+        return lambda p: build_all_videos_url(source['orientation'], p)
+    raise ValueError(f"unknown source type {mode!r}")
+
+def listing_order(config):
+    """What a source's listing order means: most viewed first on a popular tag, otherwise newest first."""
+    if config['mode'] == 'tag' and config.get('source', {}).get('sort') == 'popular':
+        return 'most_viewed'
+    return 'newest'
+
+def source_from_description(mode, description):
+    """Source parameters recovered from the description of a session saved before they were."""
+    if mode == 'tag':
+        # Format: "Tag: tagname (orientation, sort_type)"
+        match = re.match(r'Tag: (\S+) \((\w+), (\w+)\)', description)
+        if match:
+            tag, orientation, sort_type = match.groups()
+            return {'tag': tag, 'orientation': orientation, 'sort': sort_type}
+    elif mode == 'profile':
+        match = re.match(r'Profile: (\S+)', description)
+        if match:
+            return {'member_id': match.group(1)}
+    elif mode == 'all':
+        return {'orientation': 'gay' if 'gay' in description.lower() else 'straight'}
+    return None
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# HTTP SESSION
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def make_session(connections=SCAN_CONNECTIONS):
+    """Session whose connection pool is sized to the scan concurrency."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=4, pool_maxsize=connections, pool_block=True
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """The one pooled session shared by page detection, scanning and updates."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = make_session(max(SCAN_CONNECTIONS, SCAN_CONCURRENCY))
+        return _session
+
+# Links already parsed out of a page fetched for another reason (page 1 is
+# read by find_last_page), handed to the scan so it isn't fetched twice.
+# They go stale like PAGE_CACHE entries do, after PAGE_CACHE_TTL.
+_prefetched_links = {}  # url → (fetched at, links)
+
+def remember_links(url, content):
+    """Parse a listing page fetched for another reason and keep its links for the scan."""
+    links = parse_listing(content)
+    now = time.time()
+    for old_url, (fetched, _) in list(_prefetched_links.items()):
+        if now - fetched > PAGE_CACHE_TTL:
+            _prefetched_links.pop(old_url, None)
+    _prefetched_links[url] = (now, links)
+    return links
+
+def take_prefetched_links(url):
+    entry = _prefetched_links.pop(url, None)
+    if entry and time.time() - entry[0] <= PAGE_CACHE_TTL:
+        return entry[1]
+    return None
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# RATE LIMITING
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class RateLimiter:
+    """
+    Token bucket shared by every request to the site.
+    The rate ramps up additively while responses are fast and healthy, and is
+    cut multiplicatively on 429/5xx, timeouts or a Retry-After header (AIMD).
+    """
+    
+    def __init__(self, rate=RATE_START, min_rate=RATE_MIN, max_rate=RATE_MAX,
+                 step=RATE_STEP, backoff=0.5):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.step = step
+        self.backoff = backoff
+        self.tokens = 1.0
+        self.paused_until = 0.0
+        self.events = deque(maxlen=50)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(1.0, self.tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                elif self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                else:
+                    wait = (1.0 - self.tokens) / self.rate
+            time.sleep(wait)
+    
+    def record(self, status, latency, retry_after=None):
+        """Feed back the outcome of a request (status None = no response)."""
+        with self._lock:
+            delay = parse_retry_after(retry_after)
+            if status is None or status == 429 or status >= 500 or delay:
+                reason = f"HTTP {status}" if status else "no response"
+                self._back_off(reason, delay)
+            elif latency <= SLOW_RESPONSE:
+                self.rate = min(self.max_rate, self.rate + self.step)
+    
+    def _back_off(self, reason, delay=None):
+        old = self.rate
+        self.rate = max(self.min_rate, self.rate * self.backoff)
+        self.tokens = min(self.tokens, 0.0)
+        if delay:
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+            reason += f", Retry-After {delay:.0f}s"
+        self.events.append((datetime.now(), old, self.rate, reason))
+    
+    def summary(self):
+        text = f"{self.rate:.1f} req/s"
+        if self.events:
+            text += f", backed off {len(self.events)}x (last: {self.events[-1][3]})"
+        return text
+
+def parse_retry_after(value):
+    """Retry-After is either delta-seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+        return max(0.0, when.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+LIMITER = RateLimiter()
+
+def limited_get(session, url, **kwargs):
+    """GET through the shared limiter, feeding the outcome back into it."""
+    LIMITER.acquire()
+    started = time.monotonic()
+    try:
+        response = session.get(url, **kwargs)
+    except requests.exceptions.RequestException:
+        LIMITER.record(None, time.monotonic() - started)
+        raise
+    LIMITER.record(response.status_code, time.monotonic() - started,
+                   response.headers.get('Retry-After'))
+    return response
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# RETRIES
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def is_transient(error):
+    """Errors worth another try: timeouts, dropped connections, 429 and 5xx."""
+    if isinstance(error, requests.exceptions.HTTPError):
+        status = error.response.status_code if error.response is not None else 0
+        return status in (408, 429) or status >= 500
+    return isinstance(error, (requests.exceptions.ConnectionError,
+                              requests.exceptions.Timeout,
+                              requests.exceptions.ChunkedEncodingError))
+
+def failure_class(error):
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        return f"HTTP {error.response.status_code}"
+    if isinstance(error, requests.exceptions.Timeout):
+        return "timeout"
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return "connection error"
+    return type(error).__name__
+
+def with_retries(func, *args, retries=SCRAPE_RETRIES, **kwargs):
+    """Call func, retrying transient errors with jittered exponential backoff."""
+    for attempt in range(retries + 1):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt == retries or not is_transient(e):
+                raise
+            time.sleep(RETRY_BACKOFF * 2 ** attempt * random.uniform(0.5, 1.5))
+
+def get_with_retry(session, url, **kwargs):
+    """limited_get + raise_for_status, retried on transient failures."""
+    def attempt():
+        response = limited_get(session, url, **kwargs)
+        response.raise_for_status()
+        return response
+    return with_retries(attempt)
+
+def summarize_failures(failed_pages):
+    """'2 timeout, 1 HTTP 503' from {page: failure class}."""
+    counts = {}
+    for reason in failed_pages.values():
+        counts[reason] = counts.get(reason, 0) + 1
+    return ", ".join(f"{n} {reason}" for reason, n in sorted(counts.items(), key=lambda c: -c[1]))
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # AUTO-DETECT LAST PAGE
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def find_last_page(first_page_url):
+def _pager_last_page(soup):
+    """Highest page number the pager shows (it may be windowed)."""
+    pagination = soup.find('div', class_='pagination') or soup.find('ul', class_='pagination')
+    
+    if pagination:
+        page_links = pagination.find_all('a')
+        page_nums = []
+        for link in page_links:
+            text = link.get_text().strip()
+            if text.isdigit():
+                page_nums.append(int(text))
+        if page_nums:
+            return max(page_nums)
+    
+    last_link = soup.find('a', class_='last') or soup.find('a', string=re.compile(r'last|»', re.I))
+    if last_link and last_link.get('href'):
+        match = re.search(r'/(\d+)/?$', last_link['href'])
+        if match:
+            return int(match.group(1))
+    
+    return None
+
+def page_has_videos(url):
+    """True if a listing page exists and lists at least one video."""
+    response = limited_get(get_session(), url, headers=HEADERS, timeout=REQUEST_TIMEOUT)
+    if response.status_code == 404:
+        return False
+    response.raise_for_status()
+    # Out-of-range pages that bounce back to page 1 count as empty
+    if response.history and response.url.rstrip('/') != url.rstrip('/'):
+        return False
+    links = remember_links(url, response.content)
+    return bool(links)
+
+def probe_last_page(url_builder, known=1):
+    """
+    Gallop past `known` (a page with videos) at +1, +2, +4, ... until a page
+    comes back empty, then binary-search the boundary: O(log n) requests.
+    """
+    lo, hi, step = known, None, 1
+    while hi is None:
+        page = known + step
+        if page > MAX_PROBE_PAGE:
+            return lo
+        if page_has_videos(url_builder(page)):
+            lo = page
+            step *= 2
+        else:
+            hi = page
+    
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if page_has_videos(url_builder(mid)):
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+def load_last_page_cache():
     try:
-        response = requests.get(first_page_url, headers=HEADERS, timeout=REQUEST_TIMEOUT)
+        with open(LAST_PAGE_CACHE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except:
+        return {}
+
+def cached_last_page(url):
+    entry = load_last_page_cache().get(url)
+    if entry and time.time() - entry.get('checked', 0) < LAST_PAGE_TTL:
+        return entry.get('last_page')
+    return None
+
+def cache_last_page(url, last_page):
+    cache = load_last_page_cache()
+    now = time.time()
+    cache = {u: e for u, e in cache.items() if now - e.get('checked', 0) < LAST_PAGE_TTL}
+    cache[url] = {'last_page': last_page, 'checked': now}
+    try:
+        CONFIG_DIR.mkdir(exist_ok=True)
+        with open(LAST_PAGE_CACHE, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, indent=2)
+    except OSError:
+        pass
+
+def find_last_page(first_page_url, url_builder=None):
+    cached = cached_last_page(first_page_url)
+    if cached:
+        return cached
+    
+    try:
+        response = limited_get(get_session(), first_page_url, headers=HEADERS, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
+        links = remember_links(first_page_url, response.content)
         soup = BeautifulSoup(response.content, 'html.parser')
-        
-        pagination = soup.find('div', class_='pagination') or soup.find('ul', class_='pagination')
-        
-        if pagination:
-            page_links = pagination.find_all('a')
-            page_nums = []
-            for link in page_links:
-                text = link.get_text().strip()
-                if text.isdigit():
-                    page_nums.append(int(text))
-            if page_nums:
-                return max(page_nums)
-        
-        last_link = soup.find('a', class_='last') or soup.find('a', string=re.compile(r'last|»', re.I))
-        if last_link and last_link.get('href'):
-            match = re.search(r'/(\d+)/?$', last_link['href'])
-            if match:
-                return int(match.group(1))
-        
-        return 1
+        visible = _pager_last_page(soup)
     except Exception as e:
         print(f"\n  ⚠️  Couldn't auto-detect pages: {e}")
         return None
+    
+    last_page = visible or 1
+    if not url_builder:
+        # Without probing, the pager's count isn't the real end, so don't cache it
+        return last_page
+    if PROBE_LAST_PAGE and links:
+        try:
+            last_page = probe_last_page(url_builder, last_page)
+        except Exception as e:
+            print(f"\n  ⚠️  Couldn't probe past page {last_page}: {e}")
+            return last_page
+    
+    cache_last_page(first_page_url, last_page)
+    return last_page
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# LINK EXTRACTION
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# Listing pages only matter for their <a class="tumbpu" href=...> thumbnails,
+# so the default backend looks at anchor start tags and nothing else.
+_ANCHOR_TAG = re.compile(rb'<a\s(?:[^>"\']|"[^"]*"|\'[^\']*\')*>', re.I)
+_ATTRIBUTE = re.compile(rb'''([^\s=/>]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))''')
+
+def _anchor_href(tag):
+    if b'tumbpu' not in tag:
+        return None
+    attrs = {}
+    for match in _ATTRIBUTE.finditer(tag, 2):
+        name = match.group(1).lower()
+        if name not in attrs:
+            value = match.group(2)
+            if value is None:
+                value = match.group(3) if match.group(3) is not None else match.group(4)
+            attrs[name] = value
+    if b'href' not in attrs or b'tumbpu' not in attrs.get(b'class', b'').split():
+        return None
+    return html.unescape(attrs[b'href'].decode('utf-8', 'replace'))
+
+def _extract_scan(content):
+    links = []
+    for match in _ANCHOR_TAG.finditer(content):
+        href = _anchor_href(match.group(0))
+        if href is not None:
+            links.append(href)
+    return links
+
+def _extract_lxml(content):
+    tree = lxml.html.fromstring(content)
+    return [str(href) for href in tree.xpath(
+        '//a[contains(concat(" ", normalize-space(@class), " "), " tumbpu ")]/@href'
+    )]
+
+def _extract_bs4(content):
+    soup = BeautifulSoup(content, 'html.parser')
+    return [a['href'] for a in soup.find_all('a', class_='tumbpu') if a.has_attr('href')]
+
+def _extract_verify(content):
+    fast = _extract_scan(content)
+    slow = _extract_bs4(content)
+    if fast != slow:
+        print(f"\n  ⚠️  Link extractor mismatch: scan found {len(fast)}, bs4 found {len(slow)}")
+    return slow
+
+# A thumbnail shows the video's length inside its anchor, e.g.
+# <span class="duration">12:34</span>
+_DURATION = re.compile(rb'''class\s*=\s*["'][^"']*duration[^"']*["'][^>]*>\s*(?:<[^>]*>\s*)*(\d{1,2}(?::\d{2}){1,2})(?!\d)''', re.I)
+_ANCHOR_END = re.compile(rb'</a\s*>', re.I)
+
+def _duration_seconds(content):
+    match = _DURATION.search(content)
+    if not match:
+        return None
+    seconds = 0
+    for part in match.group(1).split(b':'):
+        seconds = seconds * 60 + int(part)
+    return seconds
+
+class LinkScanner:
+    """
+    Incremental version of the scan extractor: feed() it body chunks as they
+    arrive and it returns the links whose thumbnails have closed so far.
+    Only the unfinished tail of the page is kept in memory. The length a
+    thumbnail shows goes into `durations` before its link is returned;
+    close() returns a last link the page never closed.
+    """
+    
+    MAX_TAIL = 64 * 1024
+    MAX_BODY = 8 * 1024
+    
+    def __init__(self):
+        self.buffer = b''
+        self.pending = None   # href of the thumbnail whose content is being read
+        self.body = b''
+        self.durations = {}   # href → seconds shown on its thumbnail
+    
+    def _finish(self, links):
+        end = _ANCHOR_END.search(self.body)
+        seconds = _duration_seconds(self.body[:end.start()] if end else self.body)
+        if seconds:
+            self.durations[self.pending] = seconds
+        links.append(self.pending)
+        self.pending, self.body = None, b''
+    
+    def _read(self, content, links):
+        if self.pending is None:
+            return
+        self.body += content
+        if _ANCHOR_END.search(self.body) or len(self.body) > self.MAX_BODY:
+            self._finish(links)
+    
+    def feed(self, chunk):
+        data = self.buffer + chunk
+        links = []
+        end = 0
+        for match in _ANCHOR_TAG.finditer(data):
+            # Anchors don't nest, so the previous thumbnail is over by now
+            self._read(data[end:match.start()], links)
+            if self.pending is not None:
+                self._finish(links)
+            href = _anchor_href(match.group(0))
+            if href is not None:
+                self.pending = href
+            end = match.end()
+        
+        # Keep from the last tag that may still be open
+        tail = data[end:]
+        start = max(tail.rfind(b'<a '), tail.rfind(b'<A '), tail.rfind(b'<a\n'))
+        if start == -1:
+            start = tail.rfind(b'<')
+        if start != -1 and len(tail) - start < self.MAX_TAIL:
+            self.buffer = tail[start:]
+            tail = tail[:start]
+        else:
+            self.buffer = b''
+        self._read(tail, links)
+        return links
+    
+    def close(self):
+        links = []
+        self._read(self.buffer, links)
+        if self.pending is not None:
+            self._finish(links)
+        self.buffer = b''
+        return links
+
+def listing_durations(content):
+    """{href: seconds} for the thumbnails on a listing page that show their length."""
+    scanner = LinkScanner()
+    scanner.feed(content)
+    scanner.close()
+    return scanner.durations
+
+def parse_listing(content):
+    """
+    Video links on a listing page, keeping the lengths its thumbnails show
+    in the catalog for the download order. The scan extractor gets both in
+    one pass; the others need a second one for the lengths.
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    backend = LINK_EXTRACTOR
+    if backend == 'lxml' and lxml is None:
+        backend = 'scan'
+    if backend == 'scan':
+        scanner = LinkScanner()
+        links = scanner.feed(content) + scanner.close()
+        durations = scanner.durations
+    else:
+        links = extract_links(content, backend)
+        durations = listing_durations(content)
+    if durations:
+        CATALOG.note_durations(durations)
+    return [href for href in links if href and '/videos/' in href]
+
+EXTRACTORS = {
+    'scan': _extract_scan,
+    'lxml': _extract_lxml,
+    'bs4': _extract_bs4,
+    'verify': _extract_verify,
+}
+
+def extract_links(content, backend=None):
+    """Return the hrefs of every a.tumbpu thumbnail link in a listing page."""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    backend = backend or LINK_EXTRACTOR
+    if backend == 'lxml' and lxml is None:
+        backend = 'scan'
+    return EXTRACTORS[backend](content)
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PAGE CACHE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class PageCache:
+    """
+    Persistent cache of listing-page links, keyed by URL.
+    Within PAGE_CACHE_TTL the links are reused without a request; after that
+    the page is revalidated with If-None-Match / If-Modified-Since, and a 304
+    (or an identical body) reuses the stored links without parsing.
+    """
+    
+    def __init__(self, path=PAGE_CACHE_FILE, ttl=PAGE_CACHE_TTL, max_entries=PAGE_CACHE_MAX_ENTRIES):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = None
+        self.reset_stats()
+        self._lock = threading.Lock()
+    
+    def reset_stats(self):
+        """Start counting afresh, so summary() covers one scan."""
+        self.stats = {'fresh': 0, 'revalidated': 0, 'unchanged': 0, 'fetched': 0}
+    
+    def _load(self):
+        if self.entries is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except:
+                self.entries = {}
+        return self.entries
+    
+    def _touch(self, url):
+        entry = self._load().pop(url)
+        entry['used'] = time.time()
+        self.entries[url] = entry  # dicts keep insertion order: last = most recent
+        return entry
+    
+    def fresh(self, url):
+        with self._lock:
+            entry = self._load().get(url)
+            if entry and time.time() - entry['stored'] < self.ttl:
+                self.stats['fresh'] += 1
+                return self._touch(url)['links']
+        return None
+    
+    def validators(self, url):
+        with self._lock:
+            entry = self._load().get(url)
+            headers = {}
+            if entry and entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry and entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+            return headers
+    
+    def revalidated(self, url):
+        with self._lock:
+            if url not in self._load():
+                return []
+            self.stats['revalidated'] += 1
+            entry = self._touch(url)
+            entry['stored'] = time.time()
+            return entry['links']
+    
+    def unchanged(self, url, body_hash):
+        with self._lock:
+            entry = self._load().get(url)
+            if entry and entry.get('hash') == body_hash:
+                return entry['links']
+        return None
+    
+    def store(self, url, headers, body_hash, links):
+        with self._lock:
+            entries = self._load()
+            # Counted here rather than in unchanged(), which a streamed page never calls
+            if url in entries and entries[url].get('hash') == body_hash:
+                self.stats['unchanged'] += 1
+                self._touch(url)['stored'] = time.time()
+                return
+            self.stats['fetched'] += 1
+            entries.pop(url, None)
+            entries[url] = {
+                'etag': headers.get('ETag'),
+                'last_modified': headers.get('Last-Modified'),
+                'hash': body_hash,
+                'links': links,
+                'stored': time.time(),
+                'used': time.time(),
+            }
+            while len(entries) > self.max_entries:
+                del entries[next(iter(entries))]
+    
+    def save(self):
+        with self._lock:
+            if self.entries is None:
+                return
+            try:
+                self.path.parent.mkdir(exist_ok=True)
+                tmp = self.path.with_suffix('.tmp')
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(self.entries, f)
+                os.replace(tmp, self.path)
+            except OSError:
+                pass
+    
+    def summary(self):
+        hits = self.stats['fresh'] + self.stats['revalidated'] + self.stats['unchanged']
+        total = hits + self.stats['fetched']
+        if not total:
+            return "unused"
+        return (f"{hits}/{total} hits ({hits / total * 100:.0f}%) — "
+                f"{self.stats['fresh']} fresh, {self.stats['revalidated']} not modified, "
+                f"{self.stats['unchanged']} unchanged, {self.stats['fetched']} fetched")
+
+PAGE_CACHE = PageCache()
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SCAN CHECKPOINTS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class ScanCheckpoint:
+    """
+    The pages a full scan has got through, kept in the folder's
+    scan_pages.jsonl: one line per finished page with the links found on it,
+    or with the failure class if it gave up. A resumed scan replays the
+    links of finished pages without fetching them and only scans the rest.
+    The last line for a page wins, so a page that failed and later worked
+    counts as done.
+    """
+    
+    def __init__(self, folder):
+        self.path = Path(folder) / SCAN_FILE
+        self.pages = {}    # page → [video links]
+        self.failed = {}   # page → failure class
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue    # a line cut off by a crash
+                    self._apply(entry)
+        except OSError:
+            pass
+    
+    def _apply(self, entry):
+        page = entry['page']
+        if 'failed' in entry:
+            self.pages.pop(page, None)
+            self.failed[page] = entry['failed']
+        else:
+            self.failed.pop(page, None)
+            self.pages[page] = entry['links']
+    
+    def _append(self, entry):
+        self._apply(entry)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+    
+    def record(self, page, links):
+        self._append({'page': page, 'links': links})
+    
+    def fail(self, page, failure):
+        self._append({'page': page, 'failed': failure})
+    
+    def clear(self):
+        """Forget every page, for a scan that starts over."""
+        self.pages, self.failed = {}, {}
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # SCRAPING
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def scrape_page(url, session):
-    try:
-        response = session.get(url, headers=HEADERS, timeout=REQUEST_TIMEOUT)
+def _noted(scanner, links):
+    links = [href for href in links if href and '/videos/' in href]
+    durations = {href: scanner.durations[href] for href in links if href in scanner.durations}
+    if durations:
+        CATALOG.note_durations(durations)
+    return links
+
+def iter_page_links(response, digest=None):
+    """
+    Yield video links from a listing response while it is still downloading.
+    The lengths their thumbnails show are noted in the catalog first.
+    """
+    scanner = LinkScanner()
+    for chunk in response.iter_content(STREAM_CHUNK):
+        if digest:
+            digest.update(chunk)
+        yield from _noted(scanner, scanner.feed(chunk))
+    yield from _noted(scanner, scanner.close())
+
+def _fetch_page_links(url, session, on_link=None):
+    headers = dict(HEADERS, **PAGE_CACHE.validators(url))
+    stream = STREAM_PAGES and LINK_EXTRACTOR == 'scan'
+    response = limited_get(session, url, headers=headers, timeout=REQUEST_TIMEOUT, stream=stream)
+    
+    with response:
+        if response.status_code == 304:
+            links = PAGE_CACHE.revalidated(url)
+            for href in links:
+                if on_link:
+                    on_link(href)
+            return links
+        
         response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
+        digest = hashlib.sha1()
         
-        video_links = []
-        for a in soup.find_all('a', class_='tumbpu'):
-            href = a.get('href')
-            if href and '/videos/' in href:
-                video_links.append(href)
-        return video_links
+        if stream:
+            links = []
+            for href in iter_page_links(response, digest):
+                links.append(href)
+                if on_link:
+                    on_link(href)
+        else:
+            digest.update(response.content)
+            # An identical body was parsed (lengths and all) when it was stored
+            links = PAGE_CACHE.unchanged(url, digest.hexdigest())
+            if links is None:
+                links = parse_listing(response.content)
+            for href in links:
+                if on_link:
+                    on_link(href)
+    
+    PAGE_CACHE.store(url, response.headers, digest.hexdigest(), links)
+    return links
+
+def fetch_page(url, session, on_link=None):
+    """Video links on a listing page; raises once retries are used up."""
+    links = take_prefetched_links(url)
+    if links is None:
+        links = PAGE_CACHE.fresh(url)
+    if links is not None:
+        for href in links:
+            if on_link:
+                on_link(href)
+        return links
+    
+    return with_retries(_fetch_page_links, url, session, on_link)
+
+def scrape_page(url, session, on_link=None):
+    try:
+        return fetch_page(url, session, on_link)
     except:
         return []
 
-def scrape_all_pages(url_builder, last_page):
-    print(f"\n  🔍 Scanning {last_page} pages for videos...\n")
+async def scan_pages(url_builder, pages, session, concurrency=SCAN_CONCURRENCY,
+                     on_page=None, on_link=None, failed=None):
+    """
+    Fetch listing pages concurrently, at most `concurrency` in flight.
+    Pages are started in the order given; returns {page: [video links]}.
+    on_page(page, links) is called as each page finishes; on_link(href, rank)
+    is called from the fetching thread as soon as each link is parsed, with
+    rank = (page, position on the page).
+    Pages that still fail after retries get [] and, if a `failed` dict is
+    given, an entry {page: failure class}.
+    """
+    loop = asyncio.get_running_loop()
+    window = asyncio.Semaphore(concurrency)
+    results = {}
     
-    all_videos = set()
-    session = requests.Session()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+        def ranked(page):
+            if not on_link:
+                return None
+            position = itertools.count()
+            return lambda href: on_link(href, (page, next(position)))
+        
+        async def fetch(page):
+            async with window:
+                try:
+                    links = await loop.run_in_executor(
+                        pool, fetch_page, url_builder(page), session, ranked(page)
+                    )
+                except Exception as e:
+                    links = []
+                    if failed is not None:
+                        failed[page] = failure_class(e)
+            results[page] = links
+            if on_page:
+                on_page(page, links)
+        
+        await asyncio.gather(*(fetch(page) for page in pages))
+    
+    return results
+
+def scrape_all_pages(url_builder, last_page, concurrency=SCAN_CONCURRENCY,
+                     on_link=None, progress=progress_bar, pages=None, failed=None,
+                     checkpoint=None):
+    pages = sorted(pages, reverse=True) if pages else range(last_page, 0, -1)
+    failed = {} if failed is None else failed
     
-    for page in range(last_page, 0, -1):
-        url = url_builder(page)
-        videos = scrape_page(url, session)
-        all_videos.update(videos)
-        progress_bar(last_page - page + 1, last_page, "Scanning")
-        time.sleep(SCRAPE_DELAY)
+    # Pages the checkpoint already has are replayed instead of fetched
+    results = {}
+    if checkpoint:
+        for page in pages:
+            if page in checkpoint.pages:
+                results[page] = checkpoint.pages[page]
+                for position, href in enumerate(results[page]):
+                    if on_link:
+                        on_link(href, (page, position))
+        if results:
+            print(f"\n  ⏩ {len(results)} pages already scanned last time")
+    remaining = [page for page in pages if page not in results]
+    print(f"\n  🔍 Scanning {len(remaining)} pages for videos...\n")
+    PAGE_CACHE.reset_stats()
+    
+    session = get_session()
+    done = 0
+    started = time.monotonic()
+    
+    def on_page(page, links):
+        nonlocal done
+        done += 1
+        eta = (time.monotonic() - started) / done * (len(remaining) - done)
+        progress(done, len(remaining), "Scanning", eta=eta)
+        if checkpoint:
+            if page in failed:
+                checkpoint.fail(page, failed[page])
+            else:
+                checkpoint.record(page, links)
+    
+    results.update(asyncio.run(scan_pages(url_builder, remaining, session, concurrency,
+                                          on_page, on_link, failed)))
+    
+    # Merge top-down so results keep the last-page-first order of the old serial scan
+    all_videos = {}
+    for page in pages:
+        for video in results.get(page, []):
+            all_videos.setdefault(video)
     
     print()
+    print(f"  ⚙️  Request rate: {LIMITER.summary()}")
+    print(f"  🗃️  Page cache: {PAGE_CACHE.summary()}")
+    if failed:
+        print(f"  ⚠️  {len(failed)} pages failed ({summarize_failures(failed)}) — resume to retry them")
+    PAGE_CACHE.save()
     return list(all_videos)
 
+def scrape_new_pages(url_builder, last_page, known, stop_after=DELTA_STOP_PAGES,
+                     concurrency=SCAN_CONCURRENCY, on_link=None, progress=progress_bar,
+                     failed=None):
+    """
+    Quick update for newest-first listings: scan upward from page 1 and stop
+    once `stop_after` pages in a row contain nothing but known videos.
+    """
+    print(f"\n  ⚡ Checking for new videos (up to {last_page} pages)...\n")
+    PAGE_CACHE.reset_stats()
+    
+    session = get_session()
+    failed = {} if failed is None else failed
+    all_videos = {}
+    streak = 0
+    scanned = 0
+    
+    while scanned < last_page and streak < stop_after:
+        window = range(scanned + 1, min(scanned + concurrency, last_page) + 1)
+        results = asyncio.run(scan_pages(url_builder, window, session, concurrency,
+                                         on_link=on_link, failed=failed))
+        
+        for page in window:
+            links = results.get(page, [])
+            if page in failed:
+                # Unknown contents, so it can't count towards the streak
+                scanned = page
+                streak = 0
+                continue
+            if not links:
+                # Past the end of the listing
+                streak = stop_after
+                break
+            scanned = page
+            if all(link in known for link in links):
+                streak += 1
+            else:
+                streak = 0
+            for video in links:
+                all_videos.setdefault(video)
+            progress(page, last_page, "Scanning")
+            if streak >= stop_after:
+                break
+    
+    print()
+    print(f"  ✓ Stopped after page {scanned}")
+    print(f"  ⚙️  Request rate: {LIMITER.summary()}")
+    print(f"  🗃️  Page cache: {PAGE_CACHE.summary()}")
+    if failed:
+        print(f"  ⚠️  {len(failed)} pages failed ({summarize_failures(failed)}) — resume to retry them")
+    PAGE_CACHE.save()
+    return list(all_videos)
+
+def scan_source(config, on_link=None, progress=progress_bar):
+    """
+    Run the scan a flow's config asks for (full, quick update, or just the
+    pages that failed last time) and record the pages that failed this time
+    in config['failed_pages']. A full scan checkpoints each page as it
+    finishes; it carries on from the checkpoint when config['resume_scan']
+    is set and starts over otherwise.
+    """
+    failed = {}
+    checkpoint = ScanCheckpoint(config['folder'])
+    if on_link:
+        # Ranks carry what this listing's order means, for DOWNLOAD_ORDER
+        order, link = listing_order(config), on_link
+        on_link = lambda href, rank: link(href, (order,) + rank)
+    if config.get('retry_pages'):
+        videos = scrape_all_pages(config['url_builder'], config['last_page'],
+                                  on_link=on_link, progress=progress,
+                                  pages=config['retry_pages'], failed=failed,
+                                  checkpoint=checkpoint)
+    elif config['sync'] == 'delta':
+        videos = scrape_new_pages(config['url_builder'], config['last_page'],
+                                  load_known(config['folder']),
+                                  on_link=on_link, progress=progress, failed=failed)
+    else:
+        if not config.get('resume_scan'):
+            checkpoint.clear()
+        videos = scrape_all_pages(config['url_builder'], config['last_page'],
+                                  on_link=on_link, progress=progress, failed=failed,
+                                  checkpoint=checkpoint)
+    config['failed_pages'] = sorted(failed)
+    return videos
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # DOWNLOAD TRACKING
 # ═══════════════════════════════════════════════════════════════════════════════
 
+def video_id(video_url):
+    """Normalized ID for a video: the slug after /videos/."""
+    match = re.search(r'/videos/([^/?#]+)', video_url)
+    return match.group(1).lower() if match else video_url.rstrip('/').lower()
+
 def get_status_path(folder):
     return Path(folder) / STATUS_FILE
 
 def get_session_path(folder):
     return Path(folder) / SESSION_FILE
 
-def load_downloaded(folder):
-    status_path = get_status_path(folder)
-    if not status_path.exists():
-        return set()
-    
-    downloaded = set()
+# Statuses that count as a failed attempt
+FAILED_STATUSES = ('failed', 'timeout', 'error')
+
+def _fsync_dir(path):
+    """Make a rename in `path` durable (a no-op where directories can't be opened)."""
     try:
-        with open(status_path, 'r', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            next(reader, None)
-            for row in reader:
-                if len(row) >= 2 and row[1] == 'completed':
-                    downloaded.add(row[0])
-    except:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
         pass
-    return downloaded
+    finally:
+        os.close(fd)
 
-def save_status(folder, video_url, status):
-    status_path = get_status_path(folder)
+class FileLock:
+    """
+    An advisory lock on a side file, held across processes. Shared holders
+    run together; an exclusive one waits for them all and keeps them out.
+    Windows only has exclusive locks, so there shared ones are exclusive too.
+    """
+    
+    def __init__(self, path, shared=False):
+        self.path = path
+        self.shared = shared
+        self.fd = None
     
-    if not status_path.exists():
-        with open(status_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(['video_url', 'status', 'timestamp'])
+    def __enter__(self):
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl:
+                fcntl.flock(self.fd, fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX)
+            else:
+                while True:
+                    try:
+                        msvcrt.locking(self.fd, msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        time.sleep(0.05)
+        except:
+            os.close(self.fd)
+            raise
+        return self
     
-    with open(status_path, 'a', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow([video_url, status, datetime.now().isoformat()])
+    def __exit__(self, *exc):
+        try:
+            if not fcntl:
+                os.lseek(self.fd, 0, os.SEEK_SET)
+                msvcrt.locking(self.fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self.fd)
+
+class StatusStore:
+    """
+    A folder's download_status.csv as an append-only journal with an
+    in-memory index. The last row for a video is its status, except that a
+    completed one sticks. An update appends a row instead of rewriting the
+    file. refresh() folds in only the rows appended since the last read, so
+    separate processes can share one file. They coordinate through a lock
+    file next to it: appends hold it shared, while the startup repair of a
+    torn last row and the compaction swap hold it exclusively, so neither
+    can cut into a row another process is still writing.
+    
+    Writes are group-committed. Updates queue up, and whichever caller finds
+    no write in progress appends the whole queue in one write, fsynced as
+    STATUS_FSYNC says. Once the journal holds STATUS_COMPACT_RATIO rows per
+    video, a background thread checkpoints it: one row per video with its
+    latest state and failed-attempt count, written to a side file, fsynced
+    and renamed over the journal. Launch time then follows the number of
+    videos, not every event ever recorded. Worker processes never compact;
+    they just append.
+    """
+    
+    HEADER = ['video_url', 'status', 'timestamp', 'reason', 'attempts']
+    
+    def __init__(self, folder, fsync=STATUS_FSYNC):
+        self.path = get_status_path(folder)
+        self.lock_path = self.path.with_name(self.path.name + '.lock')
+        self.fsync = fsync
+        self.lock = threading.Condition()
+        self.index = {}      # video url → [status, timestamp, reason, failed attempts]
+        self.offset = 0      # bytes of the journal already indexed
+        self.rows = 0        # rows in the journal
+        self.pending = []    # rows waiting for the next group commit
+        self.queued = 0      # rows ever queued
+        self.committed = 0   # rows ever written
+        self.writing = False
+        self.compacting = False
+        self.synced = 0.0
+        self.inode = None    # a compaction elsewhere replaces the file
+        self.pinned = None   # descriptor holding that inode number
+        with self.lock:
+            if self.owner:
+                with FileLock(self.lock_path):
+                    self._read_new(repair=True)
+            else:
+                self._read_new()
+        self._compact_if_needed()
+    
+    @property
+    def owner(self):
+        # Checked live: pool workers forked later inherit this object
+        return multiprocessing.parent_process() is None
+    
+    def refresh(self):
+        """Fold in rows appended since the last read, by this process or another."""
+        with self.lock:
+            self._read_new()
+    
+    def _read_new(self, repair=False):
+        try:
+            with open(self.path, 'rb') as f:
+                if os.fstat(f.fileno()).st_ino != self.inode:
+                    if self.inode is not None:
+                        self.index, self.offset, self.rows = {}, 0, 0
+                    self._follow(f)
+                f.seek(self.offset)
+                data = f.read()
+        except OSError:
+            return
+        # A row another process is still writing waits for the next read
+        end = data.rfind(b'\n') + 1
+        if repair and end < len(data):
+            # With every writer locked out, a partial last row is a write cut off by a crash
+            with open(self.path, 'r+b') as f:
+                f.truncate(self.offset + end)
+        if not end:
+            return
+        self.offset += end
+        for row in csv.reader(io.StringIO(data[:end].decode('utf-8', 'replace'), newline='')):
+            if len(row) >= 2 and row[0] != 'video_url':
+                self._apply(row)
+                self.rows += 1
+    
+    def _follow(self, f):
+        """Index the journal open as `f` from now on."""
+        self.inode = os.fstat(f.fileno()).st_ino
+        if fcntl:
+            # Kept open, the file's inode number can't go to a later compaction's
+            if self.pinned is not None:
+                os.close(self.pinned)
+            self.pinned = os.dup(f.fileno())
+    
+    def _apply(self, row):
+        entry = self.index.get(row[0])
+        if entry is None:
+            entry = self.index[row[0]] = [None, None, None, 0]
+        elif entry[0] == 'completed':
+            return
+        if len(row) > 4 and row[4].isdigit():
+            entry[3] = int(row[4])    # a checkpoint row carries the count
+        elif row[1] in FAILED_STATUSES:
+            entry[3] += 1
+        entry[0] = row[1]
+        entry[1] = row[2] if len(row) > 2 and row[2] else None
+        entry[2] = row[3] if len(row) > 3 and row[3] else None
+    
+    def update_many(self, updates):
+        """
+        Append (video url, status, reason) rows and index them. Returns once
+        they are written, usually in the same write as other threads' rows.
+        """
+        now = datetime.now().isoformat()
+        rows = [[video_url, status, now] + ([reason] if reason else [])
+                for video_url, status, reason in updates]
+        if not rows:
+            return
+        with self.lock:
+            self.pending.extend(rows)
+            self.queued += len(rows)
+            ticket = self.queued
+            while self.committed < ticket:
+                if self.writing:
+                    self.lock.wait()
+                    continue
+                batch, self.pending = self.pending, []
+                self.writing = True
+                self.lock.release()
+                try:
+                    self._write(batch)
+                finally:
+                    self.lock.acquire()
+                    self.writing = False
+                    self.committed += len(batch)
+                    self._read_new()
+                    self.lock.notify_all()
+        if self._needs_compaction():
+            threading.Thread(target=self._compact_if_needed, daemon=True).start()
+    
+    def update(self, video_url, status, reason=None):
+        self.update_many([(video_url, status, reason)])
+    
+    def _write(self, batch):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if not self.path.exists():
+            writer.writerow(self.HEADER)
+        writer.writerows(batch)
+        with FileLock(self.lock_path, shared=True), \
+                open(self.path, 'a', newline='', encoding='utf-8') as f:
+            f.write(buffer.getvalue())
+            f.flush()
+            now = time.time()
+            if self.fsync == 'commit' or (self.fsync == 'interval' and
+                                          now - self.synced >= STATUS_FSYNC_INTERVAL):
+                os.fsync(f.fileno())
+                self.synced = now
+    
+    def _needs_compaction(self):
+        return (self.owner and not self.compacting and self.rows >= STATUS_COMPACT_MIN_ROWS
+                and self.rows > STATUS_COMPACT_RATIO * len(self.index))
+    
+    def _compact_if_needed(self):
+        try:
+            self.compact(only_if_needed=True)
+        except Exception:
+            pass    # the journal is untouched until the rename; the next update tries again
+    
+    def compact(self, only_if_needed=False):
+        """Checkpoint the journal down to one row per video."""
+        with self.lock:
+            # Checked again here: other threads may have started one, or just finished
+            if self.compacting or (only_if_needed and not self._needs_compaction()):
+                return
+            self.compacting = True
+            self._read_new()
+            snapshot = [(video_url, tuple(entry)) for video_url, entry in self.index.items()]
+            mark, inode = self.offset, self.inode
+        temp = self.path.with_name(f"{self.path.name}.{os.getpid()}.compact")
+        try:
+            with open(temp, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(self.HEADER)
+                for video_url, (status, timestamp, reason, attempts) in snapshot:
+                    writer.writerow([video_url, status, timestamp or '', reason or '', attempts])
+            checkpoint = temp.stat().st_size
+            
+            # Take the writer's turn so nothing is appended during the swap
+            with self.lock:
+                while self.writing:
+                    self.lock.wait()
+                self.writing = True
+            try:
+                # Other processes' appends wait too, until the new file is in place
+                with FileLock(self.lock_path):
+                    # Rows written since the snapshot follow the checkpoint as they are
+                    with open(self.path, 'rb') as live:
+                        if os.fstat(live.fileno()).st_ino != inode:
+                            return    # another process compacted it in the meantime
+                        live.seek(mark)
+                        tail = live.read()
+                    tail = tail[:tail.rfind(b'\n') + 1]
+                    with open(temp, 'ab') as f:
+                        f.write(tail)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    # A refresh in between would take the new file for someone else's
+                    with self.lock:
+                        os.replace(temp, self.path)
+                        with open(self.path, 'rb') as f:
+                            self._follow(f)
+                        self.offset = checkpoint + (self.offset - mark)
+                        self.rows = len(snapshot) + tail.count(b'\n')
+                    _fsync_dir(self.path.parent)
+                with self.lock:
+                    self._read_new()
+            finally:
+                with self.lock:
+                    self.writing = False
+                    self.lock.notify_all()
+        finally:
+            # The side file goes before the flag, so the next compaction can't lose its own
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+            with self.lock:
+                self.compacting = False
+    
+    def get(self, video_url):
+        """(status, timestamp, reason, failed attempts) for a video, or None."""
+        with self.lock:
+            entry = self.index.get(video_url)
+            return tuple(entry) if entry else None
+    
+    def statuses(self):
+        """{video url: status} as of the last read."""
+        with self.lock:
+            return {video_url: entry[0] for video_url, entry in self.index.items()}
+    
+    def entries(self):
+        with self.lock:
+            return {video_url: tuple(entry) for video_url, entry in self.index.items()}
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def status_store(folder):
+    """The folder's StatusStore, loaded on first use and brought up to date."""
+    with _stores_lock:
+        store = _stores.get(str(folder))
+        if store is None:
+            store = _stores[str(folder)] = StatusStore(folder)
+            return store
+    store.refresh()
+    return store
+
+def load_downloaded(folder):
+    return {video_url for video_url, status in status_store(folder).statuses().items()
+            if status == 'completed'}
+
+def load_known(folder):
+    """Every video recorded in the status file, whatever its status."""
+    return set(status_store(folder).statuses())
+
+def save_status(folder, video_url, status, path=None, reason=None):
+    status_store(folder).update(video_url, status, reason)
+    CATALOG.record(video_url, status, path, source=folder)
+
+def save_config_session(config, finished=False):
+    save_session(config['folder'], {
+        'mode': config['mode'],
+        'source': config['source'],
+        'description': config['description'],
+        'last_page': config['last_page'],
+        'folder': config['folder'],
+        'sync': config['sync'],
+        'finished': finished,
+        'failed_pages': config.get('failed_pages', [])
+    })
 
 def save_session(folder, session_data):
     with open(get_session_path(folder), 'w', encoding='utf-8') as f:
@@ -251,6 +1511,434 @@ def load_session(folder):
             pass
     return None
 
+# ═══════════════════════════════════════════════════════════════════════════════
+# PARTIAL DOWNLOADS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class PartialDownloads:
+    """
+    Unfinished downloads, one small JSON file per video in the folder's
+    .partial directory: the part file, bytes already on disk, the expected
+    length and the server's validator. A file per video keeps each update
+    cheap and lets separate worker processes write without sharing a lock.
+    """
+    
+    def __init__(self, interval=PARTIAL_SAVE_INTERVAL):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.written = {}
+    
+    def _path(self, folder, video_url):
+        name = re.sub(r'[^\w.-]', '_', video_id(video_url))[:100]
+        return Path(folder) / PARTIAL_DIR / f"{name}.json"
+    
+    def get(self, folder, video_url):
+        try:
+            with open(self._path(folder, video_url), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except:
+            return None
+    
+    def pending(self, folder):
+        """URLs of every download left unfinished in `folder`."""
+        urls = []
+        for path in sorted((Path(folder) / PARTIAL_DIR).glob('*.json')):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    urls.append(json.load(f)['url'])
+            except:
+                pass
+        return urls
+    
+    def update(self, folder, video_url, entry, force=False):
+        """Persist `entry`, at most once per interval unless forced."""
+        path = self._path(folder, video_url)
+        now = time.time()
+        with self.lock:
+            if not force and now - self.written.get(path, 0) < self.interval:
+                return
+            self.written[path] = now
+        entry = dict(entry, url=video_url, updated=datetime.now().isoformat())
+        try:
+            path.parent.mkdir(exist_ok=True)
+            temp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+            with open(temp, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(temp, path)
+        except:
+            pass
+    
+    def clear(self, folder, video_url):
+        path = self._path(folder, video_url)
+        with self.lock:
+            self.written.pop(path, None)
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+    
+    def discard(self, folder, video_url):
+        """Forget a partial download and delete its part file."""
+        entry = self.get(folder, video_url)
+        if entry and entry.get('file'):
+            try:
+                os.remove(entry['file'])
+            except OSError:
+                pass
+        self.clear(folder, video_url)
+
+PARTIALS = PartialDownloads()
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CATALOG
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class Catalog:
+    """
+    One SQLite catalog (WAL mode) of every video seen in any download folder,
+    keyed by video ID, so a video fetched for a tag isn't fetched again for a
+    profile. Per-folder download_status.csv files are imported into it.
+    """
+    
+    def __init__(self, path=CATALOG_FILE):
+        self.path = Path(path)
+        self.db = None
+        self.created = False
+        self._lock = threading.Lock()
+    
+    def _connect(self):
+        if self.db is None:
+            self.path.parent.mkdir(exist_ok=True)
+            self.created = not self.path.exists()
+            self.db = sqlite3.connect(str(self.path), check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.executescript("""
+                CREATE TABLE IF NOT EXISTS videos (
+                    video_id TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    path TEXT,
+                    size INTEGER,
+                    updated TEXT
+                );
+                CREATE TABLE IF NOT EXISTS video_sources (
+                    video_id TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    PRIMARY KEY (video_id, source)
+                );
+                CREATE TABLE IF NOT EXISTS imports (
+                    status_file TEXT PRIMARY KEY,
+                    mtime REAL
+                );
+                CREATE TABLE IF NOT EXISTS extractions (
+                    video_id TEXT PRIMARY KEY,
+                    extractor_id TEXT,
+                    title TEXT,
+                    duration REAL,
+                    filesize INTEGER,
+                    view_count INTEGER,
+                    timestamp REAL,
+                    media_url TEXT,
+                    expires REAL,
+                    info TEXT NOT NULL,
+                    updated TEXT
+                );
+                CREATE TABLE IF NOT EXISTS listings (
+                    video_id TEXT PRIMARY KEY,
+                    duration REAL,
+                    updated TEXT
+                );
+            """)
+            # Catalogs made before views and upload time were kept
+            columns = {row[1] for row in self.db.execute("PRAGMA table_info(extractions)")}
+            for column, kind in (('view_count', 'INTEGER'), ('timestamp', 'REAL')):
+                if column not in columns:
+                    self.db.execute(f"ALTER TABLE extractions ADD COLUMN {column} {kind}")
+        return self.db
+    
+    def record(self, video_url, status, path=None, source=None, commit=True):
+        size = os.path.getsize(path) if path and os.path.isfile(path) else None
+        vid = video_id(video_url)
+        with self._lock:
+            db = self._connect()
+            # A completed download is never downgraded by a later failure elsewhere
+            db.execute("""
+                INSERT INTO videos (video_id, url, status, path, size, updated)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(video_id) DO UPDATE SET
+                    status = excluded.status,
+                    path = COALESCE(excluded.path, videos.path),
+                    size = COALESCE(excluded.size, videos.size),
+                    updated = excluded.updated
+                WHERE videos.status != 'completed' OR excluded.status = 'completed'
+            """, (vid, video_url, status, path, size, datetime.now().isoformat()))
+            if source:
+                db.execute("INSERT OR IGNORE INTO video_sources VALUES (?, ?)",
+                           (vid, str(source)))
+            if commit:
+                db.commit()
+    
+    def lookup(self, video_url):
+        """(status, path) for a video, or None if it has never been seen."""
+        with self._lock:
+            return self._connect().execute(
+                "SELECT status, path FROM videos WHERE video_id = ?", (video_id(video_url),)
+            ).fetchone()
+    
+    def import_folder(self, folder):
+        """Bring a folder's download_status.csv into the catalog (skipped if unchanged)."""
+        status_path = get_status_path(folder)
+        try:
+            mtime = status_path.stat().st_mtime
+        except OSError:
+            return 0
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT mtime FROM imports WHERE status_file = ?", (str(status_path),)
+            ).fetchone()
+        if row and row[0] == mtime:
+            return 0
+        
+        try:
+            latest = status_store(folder).statuses()
+        except csv.Error:
+            return 0
+        
+        for video_url, status in latest.items():
+            self.record(video_url, status, source=folder, commit=False)
+        with self._lock:
+            self.db.execute("INSERT OR REPLACE INTO imports VALUES (?, ?)", (str(status_path), mtime))
+            self.db.commit()
+        return len(latest)
+    
+    def cache_info(self, video_url, info):
+        """Keep yt-dlp's processed (sanitized) info for a video."""
+        formats = info.get('requested_formats') or [info]
+        media_url = formats[0].get('url')
+        expires = min(media_expiry(f.get('url') or '') for f in formats)
+        filesize = sum(f.get('filesize') or f.get('filesize_approx') or 0 for f in formats) or None
+        with self._lock:
+            db = self._connect()
+            db.execute("""
+                INSERT OR REPLACE INTO extractions (video_id, extractor_id, title, duration,
+                    filesize, view_count, timestamp, media_url, expires, info, updated)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                video_id(video_url), info.get('id'), info.get('title'), info.get('duration'),
+                filesize, info.get('view_count'), info.get('timestamp'), media_url, expires,
+                json.dumps(info), datetime.now().isoformat(),
+            ))
+            db.commit()
+    
+    def cached_info(self, video_url):
+        """The cached info for a video while its media URL is still valid, else None."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT info FROM extractions WHERE video_id = ? AND expires > ?",
+                (video_id(video_url), time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def expire_info(self, video_url):
+        """Stop trusting a cached media URL (it failed); the metadata stays."""
+        with self._lock:
+            db = self._connect()
+            db.execute("UPDATE extractions SET expires = 0 WHERE video_id = ?", (video_id(video_url),))
+            db.commit()
+    
+    def note_durations(self, durations):
+        """Keep the lengths listing thumbnails show, {video url: seconds}."""
+        now = datetime.now().isoformat()
+        with self._lock:
+            db = self._connect()
+            db.executemany("INSERT OR REPLACE INTO listings VALUES (?, ?, ?)",
+                           [(video_id(video_url), seconds, now) for video_url, seconds in durations.items()])
+            db.commit()
+    
+    def metadata(self, video_url):
+        """
+        Title, duration, size, views and upload time from the last extraction,
+        even once its URL has expired. Before any extraction, the duration a
+        listing showed is all there is.
+        """
+        vid = video_id(video_url)
+        with self._lock:
+            db = self._connect()
+            row = db.execute(
+                "SELECT extractor_id, title, duration, filesize, view_count, timestamp "
+                "FROM extractions WHERE video_id = ?", (vid,)
+            ).fetchone()
+            listed = db.execute("SELECT duration FROM listings WHERE video_id = ?", (vid,)).fetchone()
+        if not row and not listed:
+            return None
+        meta = dict(zip(('id', 'title', 'duration', 'filesize', 'view_count', 'timestamp'), row or (None,) * 6))
+        if not meta['duration'] and listed:
+            meta['duration'] = listed[0]
+        return meta
+    
+    def warm_up(self):
+        """
+        On the very first run, import the status files in the default
+        download folders (all on the Desktop) so the catalog starts warm.
+        """
+        with self._lock:
+            self._connect()
+            if not self.created:
+                return 0
+            self.created = False
+        imported = 0
+        for status_path in (Path.home() / "Desktop").glob(f"*/{STATUS_FILE}"):
+            imported += self.import_folder(status_path.parent)
+        return imported
+
+CATALOG = Catalog()
+
+def media_expiry(media_url):
+    """
+    When a resolved media URL stops working: its own expiry parameter if it
+    carries a plausible one, otherwise EXTRACTION_TTL from now.
+    """
+    now = time.time()
+    query = parse_qs(urlsplit(media_url).query)
+    for key in ('expires', 'expire', 'exp', 'e', 'validto', 'valid_to'):
+        value = (query.get(key) or [''])[0]
+        if value.isdigit() and now < int(value) < now + 7 * 86400:
+            return int(value) - 60
+    return now + EXTRACTION_TTL
+
+def copy_elsewhere(video_url):
+    """The file of a finished download of this video, if the catalog knows one that's still there."""
+    entry = CATALOG.lookup(video_url)
+    # Imported from an old status file, or only its folder was recorded
+    if not entry or entry[0] != 'completed' or not entry[1] or not os.path.isfile(entry[1]):
+        return None
+    return entry[1]
+
+def have_elsewhere(video_url, folder):
+    """
+    True if the catalog knows a downloaded copy of this video and it is
+    now in `folder` too: linked there and recorded, or already there.
+    Otherwise it still needs downloading into `folder`.
+    """
+    path = copy_elsewhere(video_url)
+    if not path or not link_into(path, folder):
+        return False
+    save_status(folder, video_url, 'completed', path)
+    return True
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# DOWNLOAD FAILURES
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class DownloadFailed(Exception):
+    """yt-dlp exited with an error; the message is what it printed."""
+
+# (failure class, pattern in the error text), first match wins
+FAILURE_PATTERNS = [
+    ('removed', r'removed|deleted|no longer available|copyright|terminated|does not exist'),
+    ('private', r'private|friends only|members only|\b401\b|log ?in|sign ?in'),
+    ('not found', r'\b(404|410)\b|not found'),
+    ('rate limited', r'\b429\b|too many requests|rate.?limit'),
+    ('timeout', r'timed? ?out|stalled'),
+    ('network', r'connection|reset by peer|refused|name resolution|\b5\d\d\b|incomplete|ssl'),
+    ('extractor', r'unable to extract|unsupported url|no video formats|extractor'),
+]
+
+# Failures that won't go away by trying again
+DEAD_FAILURES = {'removed', 'private', 'not found'}
+
+def classify_failure(message):
+    """Failure class for a download error, from yt-dlp's or requests' message."""
+    # Drop URLs and the "[extractor] video-id:" prefix so a slug can't match
+    text = re.sub(r'https?://\S+', '', str(message).lower())
+    text = re.sub(r'^\s*(error:\s*)?\[[^\]]*\]\s*[^:\s]*:', '', text, flags=re.M)
+    for name, pattern in FAILURE_PATTERNS:
+        if re.search(pattern, text):
+            return name
+    return 'other'
+
+class DownloadFailures:
+    """
+    Failed attempts per video, read back from the status files. A transient
+    failure is retried with exponential backoff until DOWNLOAD_ATTEMPTS is
+    used up. A dead video (removed, private, 404) is parked for good, so it
+    stops costing a worker slot and an extraction on every run.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.history = {}     # video url → [attempts, time of last failure, failure class]
+        self.parked = set()
+        self.loaded = set()
+    
+    def load(self, folder):
+        """Pick up earlier runs' failures from a folder's status file (once)."""
+        with self.lock:
+            if folder in self.loaded:
+                return
+            self.loaded.add(folder)
+        entries = status_store(folder).entries()
+        with self.lock:
+            for video_url, (status, timestamp, reason, attempts) in entries.items():
+                if status == 'parked':
+                    self.parked.add(video_url)
+                elif status in FAILED_STATUSES and attempts:
+                    try:
+                        failed_at = datetime.fromisoformat(timestamp).timestamp()
+                    except (TypeError, ValueError):
+                        failed_at = 0
+                    self.history[video_url] = [attempts, failed_at, reason]
+    
+    def is_parked(self, video_url):
+        if video_url in self.parked:
+            return True
+        known = CATALOG.lookup(video_url)
+        return bool(known and known[0] == 'parked')
+    
+    def backoff(self, attempts):
+        return DOWNLOAD_RETRY_DELAY * 2 ** max(0, attempts - 1)
+    
+    def wait(self, video_url):
+        """Seconds until a video that failed before is due another try."""
+        with self.lock:
+            entry = self.history.get(video_url)
+        if not entry:
+            return 0
+        return max(0, entry[1] + self.backoff(entry[0]) - time.time())
+    
+    def record(self, video_url, failure):
+        """Count a failed attempt; returns the delay before the next one, or None once parked."""
+        with self.lock:
+            entry = self.history.setdefault(video_url, [0, 0, None])
+            entry[0] += 1
+            entry[1] = time.time()
+            entry[2] = failure
+            if failure in DEAD_FAILURES or entry[0] >= DOWNLOAD_ATTEMPTS:
+                self.parked.add(video_url)
+                return None
+            return self.backoff(entry[0]) * random.uniform(0.8, 1.2)
+    
+    def clear(self, video_url):
+        with self.lock:
+            self.history.pop(video_url, None)
+
+FAILURES = DownloadFailures()
+
+def record_outcome(folder, video_url, path, failure=None):
+    """
+    Save how a download went. Returns the seconds to wait before trying it
+    again, or None when there is nothing left to do: it finished, it is
+    dead, or it has used up its attempts.
+    """
+    if path:
+        FAILURES.clear(video_url)
+        save_status(folder, video_url, 'completed', path)
+        return None
+    delay = FAILURES.record(video_url, failure)
+    save_status(folder, video_url, 'parked' if delay is None else 'failed', reason=failure)
+    return delay
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # DOWNLOADING
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -267,42 +1955,968 @@ def install_yt_dlp():
     result = subprocess.run([sys.executable, "-m", "pip", "install", "yt-dlp", "-q"])
     return result.returncode == 0
 
+OUTPUT_TEMPLATE = '%(title)s [%(id)s].%(ext)s'
+
+yt_dlp = None
+_ydl_local = threading.local()
+
+def load_yt_dlp():
+    """Import yt_dlp on first use; None if only the command is available."""
+    global yt_dlp
+    if yt_dlp is None:
+        try:
+            import yt_dlp as module
+            yt_dlp = module
+        except ImportError:
+            return None
+    return yt_dlp
+
+class _QuietLogger:
+    """
+    Swallows yt-dlp's messages: even quiet, it prints errors to stderr,
+    which breaks the live status line. An error's text still arrives in
+    the DownloadError it raises.
+    """
+    
+    def debug(self, message):
+        pass
+    
+    info = warning = error = debug
+
+def _youtube_dl(folder):
+    """This thread's YoutubeDL for `folder`, created once and then reused."""
+    instances = getattr(_ydl_local, 'instances', None)
+    if instances is None:
+        instances = _ydl_local.instances = {}
+    ydl = instances.get(folder)
+    if ydl is None:
+        ydl = yt_dlp.YoutubeDL({
+            'format': 'best',
+            'quiet': True,
+            'no_warnings': True,
+            'noprogress': True,
+            'overwrites': False,
+            'socket_timeout': REQUEST_TIMEOUT,
+            'logger': _QuietLogger(),
+            'outtmpl': os.path.join(folder, OUTPUT_TEMPLATE),
+            'progress_hooks': [_progress_hook],
+        })
+        instances[folder] = ydl
+    return ydl
+
+def _progress_hook(d):
+    if d.get('status') != 'downloading':
+        return
+    done = d.get('downloaded_bytes') or 0
+    # A resumed download starts counting at the bytes already on disk
+    last = getattr(_ydl_local, 'last_bytes', None)
+    _ydl_local.last_bytes = done
+    if last is not None and done > last:
+        BANDWIDTH.add(done - last)
+    job = getattr(_ydl_local, 'job', None)
+    if job and d.get('tmpfilename'):
+        _ydl_local.partial = {
+            'file': d['tmpfilename'],
+            'offset': done,
+            'length': d.get('total_bytes') or d.get('total_bytes_estimate'),
+            'validator': None,
+        }
+        PARTIALS.update(*job, _ydl_local.partial)
+
+def drop_stale_partial(folder, video_url, expected=None):
+    """
+    yt-dlp continues a .part file from its size, so a preallocated segmented
+    part file, or one for a different length, has to go before handing over.
+    """
+    entry = PARTIALS.get(folder, video_url)
+    if entry and (entry.get('segments') or
+                  (expected and entry.get('length') not in (None, expected))):
+        PARTIALS.discard(folder, video_url)
+
+def resolve_info(ydl, video_url):
+    """
+    yt-dlp's processed info for a video: from the catalog while its media URL
+    is still valid, otherwise extracted afresh and cached. Returns
+    (info, came_from_cache).
+    """
+    info = CATALOG.cached_info(video_url)
+    if info:
+        return info, True
+    info = ydl.sanitize_info(ydl.extract_info(video_url, download=False))
+    CATALOG.cache_info(video_url, info)
+    return info, False
+
+def _download_info(ydl, info, folder, video_url):
+    if SEGMENTED_DOWNLOADS:
+        path = download_segmented(ydl, info, folder, video_url)
+        if path:
+            return path
+    drop_stale_partial(folder, video_url, info.get('filesize'))
+    info = ydl.process_ie_result(dict(info), download=True)
+    downloads = (info or {}).get('requested_downloads') or []
+    return downloads[-1].get('filepath') if downloads else folder
+
+def _download_inprocess(video_url, folder):
+    _ydl_local.last_bytes = None
+    _ydl_local.job = (folder, video_url)
+    _ydl_local.partial = None
+    try:
+        ydl = _youtube_dl(folder)
+        info, cached = resolve_info(ydl, video_url)
+        try:
+            return _download_info(ydl, info, folder, video_url)
+        except Exception:
+            if not cached:
+                raise
+            # The cached media URL went stale early; extract once more
+            CATALOG.expire_info(video_url)
+            info, _ = resolve_info(ydl, video_url)
+            return _download_info(ydl, info, folder, video_url)
+    finally:
+        if _ydl_local.partial:
+            PARTIALS.update(folder, video_url, _ydl_local.partial, force=True)
+        _ydl_local.job = None
+
+PROGRESS_MARK = '[sirsthisvid]'
+
+def run_yt_dlp(args, folder, video_url):
+    """
+    Run the yt-dlp command with `args`, recording its progress in PARTIALS
+    and killing it only after STALL_TIMEOUT passes without new bytes, so a
+    long video on a slow link is never cut off while it is still moving.
+    Returns (returncode, printed lines, error text); returncode is None
+    when the download stalled.
+    """
+    cmd = ['yt-dlp', '--newline', '--progress', '--progress-template',
+           f'download:{PROGRESS_MARK} %(progress.downloaded_bytes)s '
+           '%(progress.total_bytes)s %(progress.tmpfilename)s'] + list(args)
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            text=True, encoding='utf-8', errors='replace')
+    printed, errors = [], []
+    state = {'moved': time.time(), 'done': None, 'entry': None}
+    
+    def read_output():
+        for line in proc.stdout:
+            parts = line.rstrip('\n').split(' ', 3)
+            if parts[0] != PROGRESS_MARK or len(parts) < 4:
+                printed.append(line.strip())
+                continue
+            if not parts[1].isdigit():
+                continue
+            done = int(parts[1])
+            if state['done'] is None or done > state['done']:
+                if state['done'] is not None:
+                    BANDWIDTH.add(done - state['done'], throttle=False)
+                state['done'] = done
+                state['moved'] = time.time()
+            if parts[3] != 'NA':
+                state['entry'] = {
+                    'file': parts[3],
+                    'offset': done,
+                    'length': int(parts[2]) if parts[2].isdigit() else None,
+                    'validator': None,
+                }
+                PARTIALS.update(folder, video_url, state['entry'])
+    
+    readers = [threading.Thread(target=read_output, daemon=True),
+               threading.Thread(target=lambda: errors.extend(proc.stderr), daemon=True)]
+    for reader in readers:
+        reader.start()
+    returncode = None
+    while True:
+        try:
+            returncode = proc.wait(timeout=1)
+            break
+        except subprocess.TimeoutExpired:
+            if time.time() - state['moved'] > STALL_TIMEOUT:
+                proc.kill()
+                proc.wait()
+                break
+    for reader in readers:
+        reader.join(timeout=5)
+    if returncode != 0 and state['entry']:
+        PARTIALS.update(folder, video_url, state['entry'], force=True)
+    return returncode, printed, ''.join(errors).strip()
+
+def _download_subprocess(video_url, folder, use_cache=True):
+    info = CATALOG.cached_info(video_url) if use_cache else None
+    args = [
+        '--format', 'best',
+        '--no-warnings',
+        '--quiet',
+        '--no-overwrites',
+        '--print', 'after_move:filepath',
+        '-o', os.path.join(folder, OUTPUT_TEMPLATE),
+    ]
+    if BANDWIDTH.cap:
+        # A separate process can't share the bucket, so give it its share up front
+        args[0:0] = ['--limit-rate', str(int(BANDWIDTH.share()))]
+    info_file = None
+    if info:
+        # Hand over the cached extraction instead of having yt-dlp redo it
+        with tempfile.NamedTemporaryFile('w', suffix='.info.json', delete=False,
+                                         encoding='utf-8') as f:
+            json.dump(info, f)
+            info_file = f.name
+        args += ['--load-info-json', info_file]
+    else:
+        args += ['--print', 'video:%()j', video_url]
+    drop_stale_partial(folder, video_url)
+    try:
+        returncode, printed, errors = run_yt_dlp(args, folder, video_url)
+    finally:
+        if info_file:
+            os.remove(info_file)
+    
+    paths = []
+    for line in printed:
+        if line.startswith('{'):
+            try:
+                CATALOG.cache_info(video_url, json.loads(line))
+            except ValueError:
+                pass
+        elif line:
+            paths.append(line)
+    if returncode != 0:
+        if info and returncode is not None:
+            # The cached media URL went stale early; extract once more
+            CATALOG.expire_info(video_url)
+            return _download_subprocess(video_url, folder, use_cache=False)
+        if returncode is None:
+            raise DownloadFailed(f"stalled: no progress for {STALL_TIMEOUT}s")
+        raise DownloadFailed(errors or f"yt-dlp exited with {returncode}")
+    return paths[-1] if paths else folder
+
+def attempt_download(video_url, folder):
+    """Download one video: (saved path, None), or (None, failure class) if it failed."""
+    try:
+        if DOWNLOAD_BACKEND == 'inprocess' and load_yt_dlp():
+            path = _download_inprocess(video_url, folder)
+        else:
+            path = _download_subprocess(video_url, folder)
+    except Exception as e:
+        return None, classify_failure(e)
+    if not path:
+        return None, 'other'
+    PARTIALS.clear(folder, video_url)
+    return path, None
+
 def download_video(video_url, folder):
+    """Download one video; returns the saved file's path, or None if it failed."""
+    return attempt_download(video_url, folder)[0]
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SEGMENTED DOWNLOADS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+_media_session = None
+
+def get_media_session():
+    """Pooled session for media hosts, big enough for every segment in flight."""
+    global _media_session
+    with _session_lock:
+        if _media_session is None:
+            _media_session = make_session(SEGMENTS * DOWNLOAD_WORKERS_MAX)
+        return _media_session
+
+def media_probe(url, headers, cookies):
+    """(total size, validator) if the server honours byte ranges, else (None, None)."""
+    with get_media_session().get(url, headers=dict(headers, Range="bytes=0-0"),
+                                 cookies=cookies, stream=True, timeout=REQUEST_TIMEOUT) as r:
+        if r.status_code != 206:
+            return None, None
+        match = re.search(r'/(\d+)$', r.headers.get('Content-Range', ''))
+        validator = r.headers.get('ETag') or r.headers.get('Last-Modified')
+        return (int(match.group(1)) if match else None), validator
+
+def _fetch_segment(url, headers, cookies, part_path, segment, on_progress):
+    """
+    Fill one [start, end, done] segment of the part file, continuing after
+    the `done` bytes already written, so a retry or a later run picks up
+    where the last one stopped.
+    """
+    start, end = segment[0], segment[1]
+    def attempt():
+        if start + segment[2] > end:
+            return
+        with get_media_session().get(url, headers=dict(headers, Range=f"bytes={start + segment[2]}-{end}"),
+                                     cookies=cookies, stream=True, timeout=REQUEST_TIMEOUT) as r:
+            r.raise_for_status()
+            if r.status_code != 206:
+                raise ValueError("server ignored the Range header")
+            # Unbuffered, so `done` never counts bytes still sitting in a buffer
+            with open(part_path, 'r+b', buffering=0) as f:
+                f.seek(start + segment[2])
+                for chunk in r.iter_content(64 * 1024):
+                    f.write(chunk)
+                    segment[2] += len(chunk)
+                    BANDWIDTH.add(len(chunk))
+                    on_progress()
+        if start + segment[2] <= end:
+            raise requests.exceptions.ChunkedEncodingError(
+                f"segment {start}-{end} ended after {segment[2]} bytes"
+            )
+    with_retries(attempt)
+
+def download_segmented(ydl, info, folder, video_url):
+    """
+    Download the media URL yt-dlp resolved in `info` as SEGMENTS byte ranges
+    in parallel, each retried on its own, then move the assembled file into
+    place. Progress per segment goes to PARTIALS, so an interrupted file is
+    continued next time if the server still reports the same size and
+    validator. Returns the path, or None when the format can't be split (not
+    plain HTTP, too small, or no range support) so the caller can fall back.
+    """
+    if not info or info.get('requested_formats') or info.get('protocol') not in ('http', 'https'):
+        return None
+    url = info.get('url')
+    if not url:
+        return None
+    path = ydl.prepare_filename(info)
+    if os.path.exists(path):
+        return path
+    
+    headers = info.get('http_headers') or {}
+    cookies = ydl.cookiejar
+    size, validator = media_probe(url, headers, cookies)
+    if not size or size < SEGMENT_MIN_SIZE:
+        return None
+    
+    part_path = path + '.part'
+    entry = PARTIALS.get(folder, video_url)
+    if (entry and entry.get('segments') and entry.get('file') == part_path
+            and entry.get('length') == size and entry.get('validator') == validator
+            and os.path.exists(part_path)):
+        segments = entry['segments']
+    else:
+        with open(part_path, 'wb') as f:
+            f.truncate(size)
+        step = -(-size // SEGMENTS)
+        segments = [[start, min(start + step, size) - 1, 0] for start in range(0, size, step)]
+    entry = {'file': part_path, 'length': size, 'validator': validator, 'segments': segments}
+    
+    def progress(force=False):
+        entry['offset'] = sum(done for _, _, done in segments)
+        PARTIALS.update(folder, video_url, entry, force=force)
+    
     try:
-        cmd = [
-            'yt-dlp',
-            '--format', 'best',
-            '--no-warnings',
-            '--quiet',
-            '--no-overwrites',
-            '-o', os.path.join(folder, '%(title)s [%(id)s].%(ext)s'),
-            video_url
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
-        return result.returncode == 0
-    except:
-        return False
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(segments)) as pool:
+            futures = [pool.submit(_fetch_segment, url, headers, cookies, part_path, segment, progress)
+                       for segment in segments]
+            for future in futures:
+                future.result()
+    finally:
+        progress(force=True)
+    
+    os.replace(part_path, path)
+    return path
 
-def download_all(videos, folder):
-    print(f"\n  🚀 Downloading {len(videos)} videos...\n")
+class Bandwidth:
+    """
+    Counts the bytes every download receives and, when a cap is set, holds
+    them all to it together: a download that overdraws the shared allowance
+    sleeps inside its progress hook until it is paid back.
+    """
     
-    success = 0
-    failed = 0
+    def __init__(self, cap=BANDWIDTH_CAP):
+        self.cap = cap
+        self.total = 0
+        self.active = 0
+        self._allowance = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
     
-    for i, video_url in enumerate(videos, 1):
-        progress_bar(i, len(videos), "Downloading")
-        
-        if download_video(video_url, folder):
-            save_status(folder, video_url, 'completed')
-            success += 1
+    def add(self, n, throttle=True):
+        with self._lock:
+            self.total += n
+            if not (self.cap and throttle):
+                return
+            now = time.monotonic()
+            self._allowance = min(self.cap, self._allowance + (now - self._updated) * self.cap)
+            self._updated = now
+            self._allowance -= n
+            wait = -self._allowance / self.cap if self._allowance < 0 else 0
+        if wait:
+            time.sleep(wait)
+    
+    def begin(self):
+        with self._lock:
+            self.active += 1
+    
+    def end(self):
+        with self._lock:
+            self.active -= 1
+    
+    def share(self):
+        return self.cap / max(1, self.active)
+
+BANDWIDTH = Bandwidth()
+
+# Sorts after every real key, so workers finish the queue before stopping
+STOP_KEY = (float('inf'),)
+
+def download_priority(order, video_url, rank=None, turn=0):
+    """
+    Heap key for a queued video; lower keys download first. rank is
+    (listing order, page, position) from the scan (see listing_order),
+    turn how many videos its source had queued before it.
+    
+      found        the order the scan finds them
+      smallest     shortest first, so short clips aren't stuck behind a few
+                   huge videos. The length comes from the listing thumbnail
+                   (or an earlier extraction); failing that the known file
+                   size, and videos with neither go last
+      newest       page 1 first on newest-first listings (latest tags,
+                   profiles, all videos); elsewhere by the upload time of
+                   an earlier extraction, and unknown ones last
+      most_viewed  page 1 first on popular tags; elsewhere by the views of
+                   an earlier extraction, and unknown ones last
+      round_robin  one from each source in turn
+    """
+    if order == 'round_robin':
+        return (turn,)
+    if order == 'smallest':
+        meta = CATALOG.metadata(video_url) or {}
+        if meta.get('duration'):
+            return (0, meta['duration'])
+        if meta.get('filesize'):
+            return (1, meta['filesize'])
+        return (2,)
+    if order in ('newest', 'most_viewed'):
+        if rank and rank[0] == order:
+            return (0,) + tuple(rank[1:])
+        meta = CATALOG.metadata(video_url) or {}
+        known = meta.get('timestamp' if order == 'newest' else 'view_count')
+        if known:
+            return (1, -known)
+        return (2,)
+    return ()
+
+class DownloadPool:
+    """
+    Long-lived download threads fed from one queue, with no batch barriers:
+    a worker picks up the next video the moment it finishes one.
+    
+    The queue is a heap ordered by `order` (see download_priority). In found
+    order it is bounded by `backlog`, so a scan waits for the downloads. Any
+    other order needs the whole frontier to choose from, so it is unbounded;
+    a push or pop stays O(log n) at 100k queued videos.
+    
+    Results go through a single recorder thread that calls
+    on_result(video_url, folder, path, extra, failure), so status writes
+    happen one at a time in the order downloads finish. If on_result returns
+    a number of seconds, the video is queued again after that long, without
+    holding a worker while it waits. If it raises, the video is left in
+    `unrecorded` for the caller to count as failed.
+    
+    With `adaptive`, only `limit` of the threads download at once, and a
+    controller hill-climbs that limit every ADJUST_INTERVAL seconds: add a
+    worker while total bytes/sec keeps rising, step back when it plateaus or
+    failures pick up.
+    """
+    
+    def __init__(self, on_result, workers=DOWNLOAD_WORKERS, backlog=PIPELINE_QUEUE_SIZE,
+                 adaptive=ADAPTIVE_WORKERS, max_workers=DOWNLOAD_WORKERS_MAX,
+                 order=DOWNLOAD_ORDER):
+        self.on_result = on_result
+        self.order = order
+        self.jobs = queue.PriorityQueue(maxsize=backlog if order == 'found' else 0)
+        self._sequence = itertools.count()
+        self._turns = {}
+        self.results = queue.Queue()
+        self.limit = workers
+        self.max_workers = max(workers, max_workers) if adaptive else workers
+        self.active = 0
+        self.failures = 0
+        self.retries = 0
+        self.outstanding = 0
+        self.unrecorded = {}  # video url → error class, for results on_result raised on
+        self.rate = 0.0
+        self.events = deque(maxlen=50)
+        self._slots = threading.Condition()
+        self._draining = False
+        self._closed = threading.Event()
+        self.workers = [threading.Thread(target=self._work, daemon=True)
+                        for _ in range(self.max_workers)]
+        self.recorder = threading.Thread(target=self._record, daemon=True)
+        threads = self.workers + [self.recorder]
+        if adaptive:
+            threads.append(threading.Thread(target=self._control, daemon=True))
+        for thread in threads:
+            thread.start()
+    
+    def _entry(self, video_url, folder, extra, rank):
+        with self._slots:
+            turn = self._turns.get(folder, 0)
+            self._turns[folder] = turn + 1
+        key = download_priority(self.order, video_url, rank, turn)
+        return (key, next(self._sequence), (video_url, folder, extra, rank))
+    
+    def submit(self, video_url, folder, extra=None, rank=None):
+        """
+        Queue a download; blocks while a bounded backlog is full. `rank` is
+        the video's (listing order, page, position) from the scan.
+        """
+        with self._slots:
+            self.outstanding += 1
+        self.jobs.put(self._entry(video_url, folder, extra, rank))
+    
+    def retry_later(self, video_url, folder, extra, delay, rank=None):
+        """Queue a download once `delay` seconds have passed."""
+        with self._slots:
+            self.outstanding += 1
+            self.retries += 1
+        timer = threading.Timer(delay, self.jobs.put, [self._entry(video_url, folder, extra, rank)])
+        timer.daemon = True
+        timer.start()
+    
+    def _work(self):
+        while True:
+            with self._slots:
+                while self.active >= self.limit and not self._draining:
+                    self._slots.wait()
+                self.active += 1
+            try:
+                _, _, job = self.jobs.get()
+                if job is None:
+                    return
+                video_url, folder, extra, rank = job
+                BANDWIDTH.begin()
+                started = time.monotonic()
+                try:
+                    path, failure = attempt_download(video_url, folder)
+                finally:
+                    BANDWIDTH.end()
+                if path:
+                    ETA.observe(folder, time.monotonic() - started, path)
+                # Dead videos say nothing about how many workers the link can take
+                if failure and failure not in DEAD_FAILURES:
+                    self.failures += 1
+                self.results.put(((video_url, folder, path, extra, failure), rank))
+            finally:
+                with self._slots:
+                    self.active -= 1
+                    self._slots.notify()
+    
+    def _record(self):
+        while True:
+            result = self.results.get()
+            if result is None:
+                return
+            outcome, rank = result
+            try:
+                delay = self.on_result(*outcome)
+                if delay is not None:
+                    video_url, folder, _, extra, _ = outcome
+                    self.retry_later(video_url, folder, extra, delay, rank)
+            except Exception as e:
+                # Keep recording the rest, or join() would wait forever
+                print(f"\n  ⚠️  Couldn't record {outcome[0]}: {e}")
+                self.unrecorded[outcome[0]] = failure_class(e)
+            finally:
+                with self._slots:
+                    self.outstanding -= 1
+                    self._slots.notify_all()
+    
+    def _set_limit(self, limit, reason):
+        limit = max(1, min(self.max_workers, limit))
+        if limit == self.limit:
+            return 0
+        step = limit - self.limit
+        with self._slots:
+            self.limit = limit
+            self._slots.notify_all()
+        self.events.append((datetime.now(), limit, reason))
+        return step
+    
+    def _control(self):
+        last_rate = None
+        last_step = 0
+        last_failures = 0
+        hold = 0
+        bytes_mark = BANDWIDTH.total
+        while not self._closed.wait(ADJUST_INTERVAL):
+            rate = (BANDWIDTH.total - bytes_mark) / ADJUST_INTERVAL
+            bytes_mark = BANDWIDTH.total
+            failures = self.failures - last_failures
+            last_failures = self.failures
+            
+            if failures >= 2:
+                last_step = self._set_limit(self.limit - 1, f"{failures} failures")
+                hold = 2
+            elif last_step > 0 and last_rate is not None and rate < last_rate * 1.05:
+                last_step = self._set_limit(self.limit - 1, "throughput plateaued")
+                hold = 3
+            elif hold:
+                hold -= 1
+                last_step = 0
+            elif self.jobs.qsize() and (last_rate is None or rate >= last_rate * 0.95):
+                last_step = self._set_limit(self.limit + 1, "throughput rising")
+            else:
+                last_step = 0
+            last_rate = rate
+            self.rate = rate
+    
+    def summary(self):
+        text = f"{self.limit} workers"
+        if self.rate:
+            text += f", {format_bytes(self.rate)}/s ({format_bytes(self.rate / self.limit)}/s each)"
+        if self.events:
+            text += f", last change: {self.events[-1][2]}"
+        return text
+    
+    def join(self):
+        """Wait for everything queued so far, and any retries, to finish and be recorded."""
+        with self._slots:
+            while self.outstanding:
+                self._slots.wait()
+            # Let every thread through to see its stop marker
+            self._draining = True
+            self._slots.notify_all()
+        for _ in self.workers:
+            self.jobs.put((STOP_KEY, next(self._sequence), None))
+        for thread in self.workers:
+            thread.join()
+        self._closed.set()
+        self.results.put(None)
+        self.recorder.join()
+
+def download_all(videos, folder, workers=DOWNLOAD_WORKERS, ranks=None):
+    print(f"\n  🚀 Downloading {len(videos)} videos ({workers} at a time)...\n")
+    
+    counts = {'success': 0, 'failed': 0}
+    
+    failed = {}
+    
+    def on_result(video_url, folder, path, extra, failure):
+        delay = record_outcome(folder, video_url, path, failure)
+        if delay is not None:
+            return delay
+        ETA.finish(folder, video_url)
+        if path:
+            counts['success'] += 1
+        else:
+            counts['failed'] += 1
+            failed[video_url] = failure
+        progress_bar(counts['success'] + counts['failed'], len(videos), "Downloading",
+                     eta=ETA.remaining(pool.limit))
+    
+    FAILURES.load(folder)
+    for video_url in videos:
+        ETA.track(folder, video_url)
+    pool = DownloadPool(on_result, workers)
+    for video_url in videos:
+        rank = ranks.get(video_url) if ranks else None
+        wait = FAILURES.wait(video_url)
+        if wait:
+            pool.retry_later(video_url, folder, None, wait, rank)
         else:
-            save_status(folder, video_url, 'failed')
-            failed += 1
+            pool.submit(video_url, folder, rank=rank)
+    pool.join()
+    ETA.save()
+    for video_url, failure in pool.unrecorded.items():
+        counts['failed'] += 1
+        failed[video_url] = failure
     
     print("\n")
-    print(f"  ✅ Downloaded: {success}")
-    print(f"  ❌ Failed: {failed}")
-    return success, failed
+    print(f"  ⚡ {pool.summary()}")
+    print(f"  ✅ Downloaded: {counts['success']}")
+    if pool.retries:
+        print(f"  🔁 Retries: {pool.retries}")
+    if failed:
+        print(f"  ❌ Failed: {counts['failed']} ({summarize_failures(failed)}) — parked, won't be retried")
+    else:
+        print(f"  ❌ Failed: 0")
+    return counts['success'], counts['failed']
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# DOWNLOAD ESTIMATES
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class DownloadEstimates:
+    """
+    Time left for the downloads still to do, from what this source's
+    downloads have actually taken. Every finished download updates moving
+    averages (ETA_SMOOTHING) of its wall time, its size and its bytes/sec.
+    They are kept per folder in eta.json between runs, with an overall set
+    as the fallback for a new source. A video whose size the catalog knows
+    is estimated from bytes/sec, any other from the average wall time.
+    Both are per download, so the sum is divided by the workers running.
+    """
+    
+    def __init__(self, path=ETA_FILE):
+        self.path = path
+        self.stats = None     # folder (or '*' for all) → {'seconds', 'size', 'rate'}
+        self.pending = {}     # (folder, video url) → size in bytes, or None
+        self.totals = {}      # folder → [known bytes, videos of known size, videos of unknown size]
+        self._lock = threading.Lock()
+    
+    def _load(self):
+        if self.stats is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.stats = json.load(f)
+            except (OSError, ValueError):
+                self.stats = {}
+        return self.stats
+    
+    def observe(self, folder, seconds, path):
+        """Fold in a finished download: how long it took and the file it left."""
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        with self._lock:
+            stats = self._load()
+            for key in (str(folder), '*'):
+                entry = stats.setdefault(key, {})
+                for name, value in (('seconds', seconds), ('size', size),
+                                    ('rate', size / seconds if seconds > 0 else None)):
+                    if value:
+                        old = entry.get(name)
+                        entry[name] = value if old is None else old + ETA_SMOOTHING * (value - old)
+    
+    def _averages(self, folder):
+        stats = self._load()
+        entry = stats.get(str(folder)) or stats.get('*') or {}
+        return entry.get('seconds') or AVG_DOWNLOAD_TIME, entry.get('rate')
+    
+    def track(self, folder, video_url):
+        """Count a video as still to download."""
+        size = (CATALOG.metadata(video_url) or {}).get('filesize')
+        with self._lock:
+            if (folder, video_url) in self.pending:
+                return
+            self.pending[(folder, video_url)] = size
+            totals = self.totals.setdefault(folder, [0, 0, 0])
+            if size:
+                totals[0] += size
+                totals[1] += 1
+            else:
+                totals[2] += 1
+    
+    def finish(self, folder, video_url):
+        """Stop counting a video, downloaded or given up on."""
+        with self._lock:
+            if (folder, video_url) not in self.pending:
+                return
+            size = self.pending.pop((folder, video_url))
+            totals = self.totals[folder]
+            if size:
+                totals[0] -= size
+                totals[1] -= 1
+            else:
+                totals[2] -= 1
+    
+    def _seconds(self, folder, totals):
+        known_bytes, known_count, unknown_count = totals
+        seconds, rate = self._averages(folder)
+        if rate:
+            return known_bytes / rate + unknown_count * seconds
+        return (known_count + unknown_count) * seconds
+    
+    def _spread(self, seconds, known_bytes, workers, videos):
+        # Workers beyond the videos left have nothing to share
+        seconds /= max(1, min(workers, videos))
+        if BANDWIDTH.cap:
+            # A capped link can't go faster than the cap, however many download
+            seconds = max(seconds, known_bytes / BANDWIDTH.cap)
+        return seconds
+    
+    def estimate(self, folder, videos, workers):
+        """Seconds to download `videos` into `folder` with `workers` at once, before any of it starts."""
+        sizes = [(CATALOG.metadata(video_url) or {}).get('filesize') for video_url in videos]
+        totals = [sum(filter(None, sizes)), sum(map(bool, sizes)), sum(not size for size in sizes)]
+        with self._lock:
+            return self._spread(self._seconds(folder, totals), totals[0], workers, len(videos))
+    
+    def remaining(self, workers):
+        """Seconds until every tracked video is done, at `workers` at once."""
+        with self._lock:
+            seconds = sum(self._seconds(folder, totals) for folder, totals in self.totals.items())
+            known_bytes = sum(totals[0] for totals in self.totals.values())
+            videos = sum(totals[1] + totals[2] for totals in self.totals.values())
+            return self._spread(seconds, known_bytes, workers, videos)
+    
+    def save(self):
+        with self._lock:
+            if not self.stats:
+                return
+            try:
+                CONFIG_DIR.mkdir(exist_ok=True)
+                with open(self.path, 'w', encoding='utf-8') as f:
+                    json.dump(self.stats, f, indent=2)
+            except OSError:
+                pass
+
+ETA = DownloadEstimates()
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PIPELINE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def link_into(path, folder):
+    """Make an already-downloaded file appear in another folder without a second copy."""
+    if not path or not os.path.isfile(path):
+        return False
+    dest = os.path.join(folder, os.path.basename(path))
+    if os.path.exists(dest):
+        return True
+    try:
+        os.link(path, dest)
+        return True
+    except OSError:
+        pass
+    try:
+        os.symlink(path, dest)
+        return True
+    except OSError:
+        return False
+
+def run_pipeline(configs, workers=DOWNLOAD_WORKERS):
+    """
+    Scan and download at the same time: every new video the scans turn up
+    goes straight onto the download pool's bounded queue. When the queue is
+    full the scan waits, so the backlog can't grow without limit.
+    
+    Several sources can be run together. They share one frontier keyed by
+    video ID, so a video listed by more than one source is downloaded once
+    into the first source's folder and linked into the others.
+    """
+    already_done = {}   # folder → videos completed there
+    for config in configs:
+        CATALOG.import_folder(config['folder'])
+        FAILURES.load(config['folder'])
+        already_done[config['folder']] = load_downloaded(config['folder'])
+    
+    owners = {}   # video id → [(config, url), ...]; the first one downloads it
+    paths = {}    # video id → downloaded file
+    counts = {'pages': 0, 'found': 0, 'skipped': 0, 'shared': 0, 'parked': 0,
+              'queued': 0, 'done': 0, 'failed': 0}
+    failed = {}   # video url → failure class, for those given up on
+    pages_before = 0
+    lock = threading.Lock()
+    
+    def draw():
+        shared = f"  🔗 {counts['shared']} shared" if len(configs) > 1 else ""
+        waiting = counts['queued'] - counts['done'] - counts['failed']
+        eta = f"  ⏱️  ~{format_time(ETA.remaining(pool.limit))}" if waiting else ""
+        print(f"\r  📄 {counts['pages']} pages  📊 {counts['found']} found  "
+              f"✓ {counts['skipped']} had{shared}  "
+              f"→ {waiting} waiting  "
+              f"✅ {counts['done']}  ❌ {counts['failed']}  ⚡ {pool.limit}{eta}   ", end="", flush=True)
+    
+    def on_link_for(config):
+        def on_link(video_url, rank=None):
+            vid = video_id(video_url)
+            with lock:
+                if vid in owners:
+                    if all(owner is not config for owner, _ in owners[vid]):
+                        owners[vid].append((config, video_url))
+                        counts['shared'] += 1
+                        draw()
+                    return
+                owners[vid] = [(config, video_url)]
+                counts['found'] += 1
+                if video_url in already_done[config['folder']]:
+                    counts['skipped'] += 1
+                    draw()
+                    return
+            
+            if FAILURES.is_parked(video_url):
+                with lock:
+                    counts['parked'] += 1
+                    draw()
+                return
+            
+            if have_elsewhere(video_url, config['folder']):
+                with lock:
+                    counts['skipped'] += 1
+                    draw()
+                return
+            
+            ETA.track(config['folder'], video_url)
+            with lock:
+                counts['queued'] += 1
+                draw()
+            wait = FAILURES.wait(video_url)
+            if wait:
+                pool.retry_later(video_url, config['folder'], (config, vid), wait, rank)
+            else:
+                pool.submit(video_url, config['folder'], (config, vid), rank)
+        return on_link
+    
+    def on_progress(current, total, prefix="", eta=None):
+        with lock:
+            counts['pages'] = pages_before + current
+            draw()
+    
+    def on_result(video_url, folder, path, extra, failure):
+        config, vid = extra
+        delay = record_outcome(folder, video_url, path, failure)
+        if delay is not None:
+            return delay
+        ETA.finish(folder, video_url)
+        with lock:
+            if path:
+                paths[vid] = path
+            else:
+                failed[video_url] = failure
+            counts['done' if path else 'failed'] += 1
+            draw()
+    
+    pool = DownloadPool(on_result, workers)
+    
+    # Downloads cut off last time go first, carrying on from their part files
+    for config in configs:
+        on_link = on_link_for(config)
+        for video_url in PARTIALS.pending(config['folder']):
+            on_link(video_url)
+    
+    for config in configs:
+        if len(configs) > 1:
+            print(f"\n  ▶️  {config['description']}")
+        scan_source(config, on_link=on_link_for(config), progress=on_progress)
+        pages_before = counts['pages']
+    
+    pool.join()
+    ETA.save()
+    for video_url, failure in pool.unrecorded.items():
+        counts['failed'] += 1
+        failed[video_url] = failure
+    
+    # Sources that share a video get a link to the one copy
+    linked = 0
+    for vid, entries in owners.items():
+        for config, video_url in entries[1:]:
+            if video_url in already_done[config['folder']]:
+                continue
+            if vid in paths:
+                if link_into(paths[vid], config['folder']):
+                    save_status(config['folder'], video_url, 'completed', paths[vid])
+                    linked += 1
+            elif have_elsewhere(video_url, config['folder']):
+                # Downloaded by an earlier run into another source's folder
+                linked += 1
+    
+    with lock:
+        draw()
+    print("\n")
+    print(f"  📊 Found: {counts['found']} videos")
+    print(f"  ✓ Already downloaded: {counts['skipped']}")
+    print(f"  ✅ Downloaded: {counts['done']}")
+    if linked:
+        print(f"  🔗 Linked into other folders: {linked}")
+    if pool.retries:
+        print(f"  🔁 Retries: {pool.retries}")
+    if failed:
+        print(f"  ❌ Failed: {counts['failed']} ({summarize_failures(failed)}) — parked, won't be retried")
+    else:
+        print(f"  ❌ Failed: 0")
+    if counts['parked']:
+        print(f"  ⛔ Skipped, parked earlier: {counts['parked']}")
+    print(f"  ⚡ {pool.summary()}")
+    return counts['done'], counts['failed']
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # USER INTERFACE
@@ -348,6 +2962,22 @@ def clean_path(path):
     
     return path
 
+def show_source(config):
+    print(f"  {config['description']}")
+    if config.get('retry_pages'):
+        print(f"  Pages: {len(config['retry_pages'])} that failed last time")
+    elif config['sync'] == 'delta':
+        print(f"  Pages: 1 → {config['last_page']} (quick update)")
+    else:
+        print(f"  Pages: {config['last_page']} → 1")
+    print(f"  Folder: {config['folder']}")
+
+def ask_sync():
+    return 'full' if ask_choice("", [
+        (1, "🔁 Full scan — check every page"),
+        (2, "⚡ Quick update — stop when it reaches videos you already have")
+    ]) == 1 else 'delta'
+
 def ask_folder(suggested_name):
     default = os.path.join(os.path.expanduser("~/Desktop"), suggested_name)
     
@@ -420,10 +3050,17 @@ def flow_tag():
     ])
     sort_type = "popular" if sort_type == 1 else "latest"
     
-    first_url = build_tag_url(tag, orientation, sort_type, 1)
+    sync = 'full'
+    if sort_type == "latest":
+        print()
+        sync = ask_sync()
+    
+    source = {'tag': tag, 'orientation': orientation, 'sort': sort_type}
+    url_builder = source_url_builder('tag', source)
     
     print(f"\n  🔍 Finding last page...")
-    last_page = find_last_page(first_url)
+    # A quick update stops at known videos long before the end, so it skips the probe
+    last_page = find_last_page(url_builder(1), None if sync == 'delta' else url_builder)
     
     if last_page is None:
         last_page = int(input("  Couldn't auto-detect. Enter last page number: ").strip())
@@ -438,10 +3075,12 @@ def flow_tag():
     
     return {
         'mode': 'tag',
+        'source': source,
         'last_page': last_page,
         'folder': folder,
-        'url_builder': lambda p: build_tag_url(tag, orientation, sort_type, p),
-        'description': f"Tag: {tag} ({orientation}, {sort_type})"
+        'url_builder': url_builder,
+        'description': f"Tag: {tag} ({orientation}, {sort_type})",
+        'sync': sync
     }
 
 def flow_profile():
@@ -455,10 +3094,15 @@ def flow_profile():
     if not member_id:
         return None
     
-    first_url = build_profile_url(member_id, 1)
+    print()
+    sync = ask_sync()
+    
+    source = {'member_id': member_id}
+    url_builder = source_url_builder('profile', source)
     
     print(f"\n  🔍 Finding last page...")
-    last_page = find_last_page(first_url)
+    # A quick update stops at known videos long before the end, so it skips the probe
+    last_page = find_last_page(url_builder(1), None if sync == 'delta' else url_builder)
     
     if last_page is None:
         last_page = int(input("  Couldn't auto-detect. Enter last page number: ").strip())
@@ -473,10 +3117,12 @@ def flow_profile():
     
     return {
         'mode': 'profile',
+        'source': source,
         'last_page': last_page,
         'folder': folder,
-        'url_builder': lambda p: build_profile_url(member_id, p),
-        'description': f"Profile: {member_id}"
+        'url_builder': url_builder,
+        'description': f"Profile: {member_id}",
+        'sync': sync
     }
 
 def flow_all_videos():
@@ -489,10 +3135,15 @@ def flow_all_videos():
     ])
     orientation = "gay" if orientation == 1 else "straight"
     
-    first_url = build_all_videos_url(orientation, 1)
+    print()
+    sync = ask_sync()
+    
+    source = {'orientation': orientation}
+    url_builder = source_url_builder('all', source)
     
     print(f"\n  🔍 Finding last page...")
-    last_page = find_last_page(first_url)
+    # A quick update stops at known videos long before the end, so it skips the probe
+    last_page = find_last_page(url_builder(1), None if sync == 'delta' else url_builder)
     
     if last_page is None:
         last_page = int(input("  Couldn't auto-detect. Enter last page number: ").strip())
@@ -507,10 +3158,12 @@ def flow_all_videos():
     
     return {
         'mode': 'all',
+        'source': source,
         'last_page': last_page,
         'folder': folder,
-        'url_builder': lambda p: build_all_videos_url(orientation, p),
-        'description': f"All {orientation} videos (newest)"
+        'url_builder': url_builder,
+        'description': f"All {orientation} videos (newest)",
+        'sync': sync
     }
 
 def flow_resume():
@@ -537,47 +3190,119 @@ def flow_resume():
         input("\n  Press Enter to go back...")
         return None
     
-    # Restore the url_builder based on session data
+    # Restore the url_builder from the saved source parameters; sessions
+    # saved before those were kept only have the description to go on
     session['folder'] = folder
+    session.setdefault('sync', 'full')
     
     mode = session.get('mode')
-    if mode == 'tag':
-        # We need to re-parse the description to rebuild the URL
-        # Format: "Tag: tagname (orientation, sort_type)"
-        desc = session.get('description', '')
-        match = re.match(r'Tag: (\S+) \((\w+), (\w+)\)', desc)
-        if match:
-            tag, orientation, sort_type = match.groups()
-            session['url_builder'] = lambda p, t=tag, o=orientation, s=sort_type: build_tag_url(t, o, s, p)
-        else:
-            print("\n  ⚠️  Couldn't restore session settings")
-            input("\n  Press Enter to go back...")
-            return None
-    elif mode == 'profile':
-        desc = session.get('description', '')
-        match = re.match(r'Profile: (\S+)', desc)
-        if match:
-            member_id = match.group(1)
-            session['url_builder'] = lambda p, m=member_id: build_profile_url(m, p)
-        else:
-            print("\n  ⚠️  Couldn't restore session settings")
-            input("\n  Press Enter to go back...")
-            return None
-    elif mode == 'all':
-        desc = session.get('description', '')
-        if 'gay' in desc.lower():
-            orientation = 'gay'
-        else:
-            orientation = 'straight'
-        session['url_builder'] = lambda p, o=orientation: build_all_videos_url(o, p)
-    else:
+    if mode not in ('tag', 'profile', 'all'):
         print("\n  ⚠️  Unknown session type")
         input("\n  Press Enter to go back...")
         return None
+    source = session.get('source') or source_from_description(mode, session.get('description', ''))
+    if not source:
+        print("\n  ⚠️  Couldn't restore session settings")
+        input("\n  Press Enter to go back...")
+        return None
+    session['source'] = source
+    session['url_builder'] = source_url_builder(mode, source)
+    
+    # A finished run only needs to revisit the pages that failed; an
+    # unfinished one carries on from the pages it got through
+    if session.get('finished'):
+        if session.get('failed_pages'):
+            session['retry_pages'] = session['failed_pages']
+    else:
+        session['resume_scan'] = True
     
     print(f"\n  ✓ Found session: {session.get('description', 'Unknown')}")
+    if session.get('retry_pages'):
+        print(f"  ↻ Rescanning {len(session['retry_pages'])} pages that failed last time")
+    elif session['sync'] != 'delta':
+        scanned = len(ScanCheckpoint(folder).pages)
+        if scanned:
+            print(f"  ⏩ {scanned} of {session['last_page']} pages already scanned")
     return session
-    return session
+
+def config_from_job(job):
+    """Build a flow-style config from one entry of a jobs file."""
+    kind = job.get('type')
+    orientation = job.get('orientation', 'gay')
+    sync = job.get('sync', 'full')
+    
+    if kind == 'tag':
+        tag = job['tag']
+        sort_type = job.get('sort', 'latest')
+        if sort_type != 'latest':
+            sync = 'full'
+        source = {'tag': tag, 'orientation': orientation, 'sort': sort_type}
+        description = f"Tag: {tag} ({orientation}, {sort_type})"
+        name = f"{tag}-{orientation}-{sort_type}"
+    elif kind == 'profile':
+        member_id = str(job['member_id'])
+        source = {'member_id': member_id}
+        description = f"Profile: {member_id}"
+        name = f"member-{member_id}"
+    elif kind == 'all':
+        source = {'orientation': orientation}
+        description = f"All {orientation} videos (newest)"
+        name = f"{orientation}-newest"
+    else:
+        raise ValueError(f"unknown job type {kind!r}")
+    url_builder = source_url_builder(kind, source)
+    
+    folder = os.path.expanduser(job.get('folder') or os.path.join("~/Desktop", name))
+    os.makedirs(folder, exist_ok=True)
+    
+    last_page = (job.get('last_page') or
+                 find_last_page(url_builder(1), None if sync == 'delta' else url_builder) or 1)
+    
+    return {
+        'mode': kind,
+        'source': source,
+        'last_page': last_page,
+        'folder': folder,
+        'url_builder': url_builder,
+        'description': description,
+        'sync': sync
+    }
+
+def flow_batch():
+    header()
+    print("  📚 BATCH\n")
+    
+    print("  Enter the path to a jobs file (JSON list of sources)")
+    print("  TIP: Drag the file here")
+    print()
+    path = os.path.expanduser(clean_path(input("  → ").strip()))
+    
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            jobs = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"\n  ⚠️  Couldn't read jobs file: {e}")
+        input("\n  Press Enter to go back...")
+        return None
+    
+    if isinstance(jobs, dict):
+        jobs = jobs.get('jobs', [])
+    
+    configs = []
+    print()
+    for job in jobs:
+        try:
+            print(f"  🔍 {job.get('type')}: {job.get('tag') or job.get('member_id') or job.get('orientation', '')}")
+            configs.append(config_from_job(job))
+        except (KeyError, ValueError, OSError) as e:
+            print(f"  ⚠️  Skipping job {job}: {e}")
+    
+    if not configs:
+        print("\n  ⚠️  No usable jobs in that file")
+        input("\n  Press Enter to go back...")
+        return None
+    
+    return configs
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # FIRST RUN WELCOME
@@ -619,11 +3344,10 @@ def show_welcome():
 
 def main():
     # Check if first run
-    config_dir = Path.home() / ".sirsthisvid"
-    first_run_file = config_dir / ".installed"
+    first_run_file = CONFIG_DIR / ".installed"
     
     if not first_run_file.exists():
-        config_dir.mkdir(exist_ok=True)
+        CONFIG_DIR.mkdir(exist_ok=True)
         show_welcome()
         first_run_file.touch()
     
@@ -639,6 +3363,10 @@ def main():
             print("  Try manually: pip install yt-dlp")
             sys.exit(1)
     
+    # Fill the shared catalog from existing download folders on first use
+    if CATALOG.warm_up():
+        print("  📚 Imported your existing downloads into the catalog")
+    
     while True:
         header()
         
@@ -647,7 +3375,8 @@ def main():
             (2, "👤 Profile — all videos from a user"),
             (3, "📺 All Videos — newest gay or straight"),
             (4, "⏩ Resume — continue where you left off"),
-            (5, "🔄 Check for updates"),
+            (5, "📚 Batch — several sources from a jobs file"),
+            (6, "🔄 Check for updates"),
             (0, "🚪 Exit")
         ])
         
@@ -655,10 +3384,31 @@ def main():
             print("\n  👋 Bye!\n")
             sys.exit(0)
         
-        if choice == 5:
+        if choice == 6:
             check_for_updates()
             continue
         
+        if choice == 5:
+            configs = flow_batch()
+            if not configs:
+                continue
+            for config in configs:
+                save_config_session(config)
+            
+            header()
+            print("  📋 READY TO DOWNLOAD\n")
+            for config in configs:
+                show_source(config)
+                print()
+            input("  Press Enter to start (Ctrl+C to cancel)...")
+            
+            header()
+            run_pipeline(configs)
+            for config in configs:
+                save_config_session(config, finished=True)
+            input("\n  Press Enter to continue...")
+            continue
+        
         if choice == 1:
             config = flow_tag()
         elif choice == 2:
@@ -673,42 +3423,74 @@ def main():
         if not config:
             continue
         
-        save_session(config['folder'], {
-            'mode': config['mode'],
-            'description': config['description'],
-            'last_page': config['last_page'],
-            'folder': config['folder']
-        })
+        save_config_session(config)
+        
+        if PIPELINE:
+            already_done = load_downloaded(config['folder'])
+            
+            header()
+            print("  📋 READY TO DOWNLOAD\n")
+            show_source(config)
+            print(f"  ✓ Already downloaded: {len(already_done)}")
+            print()
+            print("  Videos start downloading as soon as they're found.")
+            input("  Press Enter to start (Ctrl+C to cancel)...")
+            
+            header()
+            run_pipeline([config])
+            save_config_session(config, finished=True)
+            
+            print()
+            print(f"  📁 Videos saved to: {config['folder']}")
+            input("\n  Press Enter to continue...")
+            continue
         
         header()
-        all_videos = scrape_all_pages(config['url_builder'], config['last_page'])
+        ranks = {}   # video → (listing order, page, position), for DOWNLOAD_ORDER
+        all_videos = scan_source(config, on_link=lambda href, rank: ranks.setdefault(href, rank))
         
+        CATALOG.import_folder(config['folder'])
         already_done = load_downloaded(config['folder'])
-        to_download = [v for v in all_videos if v not in already_done]
+        FAILURES.load(config['folder'])
+        unfinished = PARTIALS.pending(config['folder'])
+        to_download, elsewhere = [], []
+        for v in dict.fromkeys(unfinished + all_videos):
+            if v in already_done or FAILURES.is_parked(v):
+                continue
+            # Only looked up for now: nothing is linked or recorded before Enter
+            if copy_elsewhere(v):
+                elsewhere.append(v)
+            else:
+                to_download.append(v)
         
         header()
         print("  📋 READY TO DOWNLOAD\n")
-        print(f"  {config['description']}")
-        print(f"  Pages: {config['last_page']} → 1")
-        print(f"  Folder: {config['folder']}")
+        show_source(config)
         print()
         print(f"  📊 Found: {len(all_videos)} videos")
         print(f"  ✓ Already downloaded: {len(already_done)}")
+        if elsewhere:
+            print(f"  🔗 Already downloaded for another source: {len(elsewhere)} (linked here)")
         print(f"  → To download: {len(to_download)}")
         
         if to_download:
-            est_time = len(to_download) * AVG_DOWNLOAD_TIME
+            est_time = ETA.estimate(config['folder'], to_download, DOWNLOAD_WORKERS)
             print(f"  ⏱️  Estimated time: {format_time(est_time)}")
         
         print()
         input("  Press Enter to start (Ctrl+C to cancel)...")
         
+        # A copy that can't be linked into this folder is downloaded after all
+        to_download += [v for v in elsewhere if not have_elsewhere(v, config['folder'])]
+        
         if not to_download:
+            save_config_session(config, finished=True)
             print("\n  ✅ Nothing new to download!")
             input("\n  Press Enter to continue...")
             continue
         
-        download_all(to_download, config['folder'])
+        download_all(to_download, config['folder'], ranks=ranks)
+        save_config_session(config, finished=True)
         
         print()
         print(f"  📁 Videos saved to: {config['folder']}")
@@ -8,36 +8,39 @@ Scrapes from highest page to page 1, tracks progress, and handles resumption.
 
 import os
 import sys
-import csv
 import json
 import time
 import requests
 import subprocess
+import queue
 import threading
 import multiprocessing
 import concurrent.futures
 from pathlib import Path
-from bs4 import BeautifulSoup
 from datetime import datetime
 
+# Share the request machinery with the packaged ripper in src/
+sys.path.insert(0, str(Path(__file__).resolve().parent / "src"))
+from sirsthisvid import (LIMITER, PARTIALS, DEAD_FAILURES, DOWNLOAD_ATTEMPTS, DOWNLOAD_RETRY_DELAY,
+                         get_with_retry, failure_class, classify_failure,
+                         extract_links, run_yt_dlp, status_store)
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # CONFIGURATION
 # ═══════════════════════════════════════════════════════════════════════════════
 
 MAX_SCRAPE_WORKERS = 5      # Concurrent page scrapes
 MAX_DOWNLOAD_WORKERS = 4    # Concurrent video downloads  
-SCRAPE_DELAY = 0.5          # Delay between scrapes (seconds)
 REQUEST_TIMEOUT = 30        # HTTP request timeout
 BATCH_SIZE = 50             # Process in batches of this many
 
-# File names (created in download folder)
-STATUS_FILE = "download_status.csv"
+# File names (created in download folder; download_status.csv is kept by
+# the package's StatusStore)
 PAGES_FILE = "scraped_pages.txt"
 SESSION_FILE = "session.json"
 
-# Locks for thread-safe file access
+# Lock for thread-safe file access
 scrape_lock = threading.Lock()
-download_lock = multiprocessing.Lock()
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # DISPLAY HELPERS
@@ -183,11 +186,6 @@ def clear_session(download_folder):
 # PROGRESS TRACKING
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def get_status_path(download_folder):
-    """Get path to status CSV file."""
-    return Path(download_folder) / STATUS_FILE
-
-
 def get_pages_path(download_folder):
     """Get path to scraped pages file."""
     return Path(download_folder) / PAGES_FILE
@@ -208,47 +206,59 @@ def load_scraped_pages(download_folder):
 
 def load_video_statuses(download_folder):
     """Load dictionary of video URLs and their download statuses."""
-    status_path = get_status_path(download_folder)
+    return status_store(download_folder).statuses()
+
+
+class StatusWriter:
+    """
+    The one thing that writes download statuses while the pool runs.
+    Download workers only report what happened; the parent puts those
+    results on a queue and this thread appends whatever has piled up in
+    one write, so no worker process ever touches the status file.
+    """
     
-    if not status_path.exists():
-        with open(status_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(['video_url', 'status', 'added_date'])
-        return {}
+    def __init__(self, download_folder):
+        self.store = status_store(download_folder)
+        self.queue = queue.Queue()
+        self.attempts = {}    # url -> failed attempts, counted as results arrive
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
     
-    video_status_map = {}
-    try:
-        with open(status_path, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            next(reader, None)  # Skip header
-            for row in reader:
-                if row and len(row) >= 2:
-                    video_status_map[row[0]] = row[1]
-    except (IOError, StopIteration) as e:
-        print_error(f"Could not read status file: {e}")
-        return {}
-    
-    return video_status_map
-
-
-def update_status_in_csv(download_folder, video_url, status, lock):
-    """Update a video's status in the CSV file."""
-    status_path = get_status_path(download_folder)
-    
-    with lock:
-        rows = []
-        with open(status_path, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            rows = list(reader)
-        
-        for i, row in enumerate(rows):
-            if row and row[0] == video_url:
-                rows[i][1] = status
-                break
-        
-        with open(status_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerows(rows)
+    def record(self, video_url, status, failure=None):
+        """
+        Queue a video's new status. A failure also counts an attempt; a dead
+        video, or one out of attempts, is parked instead. Returns the status
+        that will be written.
+        """
+        if failure:
+            if video_url not in self.attempts:
+                entry = self.store.get(video_url)
+                self.attempts[video_url] = entry[3] if entry else 0
+            self.attempts[video_url] += 1
+            if failure in DEAD_FAILURES or self.attempts[video_url] >= DOWNLOAD_ATTEMPTS:
+                status = 'parked'
+        self.queue.put((video_url, status, failure))
+        return status
+    
+    def _run(self):
+        while True:
+            update = self.queue.get()
+            batch = []
+            while update is not None:
+                batch.append(update)
+                try:
+                    update = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self.store.update_many(batch)
+            if update is None:
+                return
+    
+    def close(self):
+        """Write everything still queued and stop."""
+        self.queue.put(None)
+        self.thread.join()
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -267,43 +277,34 @@ def scrape_single_page(page_num, url_builder_func, session, download_folder,
     page_url = url_builder_func(page_num)
     
     try:
-        response = session.get(
+        response = get_with_retry(
+            session,
             page_url, 
             headers={"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"},
             timeout=REQUEST_TIMEOUT
         )
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
         
         # Find video links - ThisVid uses 'tumbpu' class for thumbnails
-        video_links = [
-            a['href'] for a in soup.find_all('a', class_='tumbpu') 
-            if a.has_attr('href')
-        ]
+        video_links = extract_links(response.content)
         
-        new_links = 0
-        status_path = get_status_path(download_folder)
         pages_path = get_pages_path(download_folder)
         
         with scrape_lock:
-            with open(status_path, 'a', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                for link in video_links:
-                    if link not in video_status_map:
-                        video_status_map[link] = 'pending'
-                        writer.writerow([link, 'pending', datetime.now().isoformat()])
-                        new_links += 1
+            new = [link for link in dict.fromkeys(video_links) if link not in video_status_map]
+            for link in new:
+                video_status_map[link] = 'pending'
+            if new:
+                status_store(download_folder).update_many((link, 'pending', None) for link in new)
+            new_links = len(new)
             
             with open(pages_path, 'a') as f:
                 f.write(f"{page_num}\n")
             scraped_pages_set.add(page_num)
         
-        time.sleep(SCRAPE_DELAY)
         return new_links
     
     except requests.exceptions.RequestException as e:
-        print_error(f"Failed to scrape page {page_num}: {e}")
+        print_error(f"Failed to scrape page {page_num} ({failure_class(e)}): {e}")
         return 0
 
 
@@ -358,6 +359,7 @@ def scrape_all_pages(url_type, identifier, start_page, end_page, download_folder
     
     print()  # New line after progress bar
     print_success(f"Scraping complete! Found {total_new_links} new video links.")
+    print_info(f"Request rate: {LIMITER.summary()}")
     return total_new_links
 
 
@@ -368,13 +370,13 @@ def scrape_all_pages(url_type, identifier, start_page, end_page, download_folder
 def download_single_video(args):
     """
     Download a single video using yt-dlp.
-    Called by the multiprocessing pool.
+    Called by the multiprocessing pool. Returns (status, url, failure class)
+    for the parent to record; workers never write the status file.
     """
     video_url, download_folder = args
     
     try:
-        command = [
-            'yt-dlp', 
+        args = [
             '--format', 'best',
             '--no-warnings',
             '--quiet',
@@ -382,36 +384,34 @@ def download_single_video(args):
             video_url
         ]
         
-        result = subprocess.run(
-            command, 
-            capture_output=True, 
-            text=True, 
-            encoding='utf-8',
-            timeout=600  # 10 minute timeout per video
-        )
+        # Only a download that stops moving times out; the .part file is
+        # kept and tracked so the next run continues it
+        returncode, _, errors = run_yt_dlp(args, download_folder, video_url)
         
-        if result.returncode == 0:
-            update_status_in_csv(download_folder, video_url, 'completed', download_lock)
-            return ('success', video_url)
+        if returncode == 0:
+            PARTIALS.clear(download_folder, video_url)
+            return ('completed', video_url, None)
+        elif returncode is None:
+            return ('timeout', video_url, 'timeout')
         else:
-            update_status_in_csv(download_folder, video_url, 'failed', download_lock)
-            return ('failed', video_url, result.stderr.strip())
+            return ('failed', video_url, classify_failure(errors))
     
-    except subprocess.TimeoutExpired:
-        update_status_in_csv(download_folder, video_url, 'timeout', download_lock)
-        return ('timeout', video_url)
     except Exception as e:
-        update_status_in_csv(download_folder, video_url, 'error', download_lock)
-        return ('error', video_url, str(e))
+        return ('error', video_url, classify_failure(e))
 
 
 def download_pending_videos(download_folder, video_status_map):
     """
-    Download all videos with 'pending' status in batches.
+    Download all videos with 'pending' status in batches, along with any
+    that stopped part-way or failed for a passing reason last time. A video
+    that fails again goes to the back of the queue until it runs out of
+    attempts; dead ones (removed, private, 404) are parked straight away.
     """
     print_section("DOWNLOADING VIDEOS")
     
-    pending_urls = [url for url, status in video_status_map.items() if status == 'pending']
+    pending_urls = [url for url, status in video_status_map.items()
+                    if status in ('pending', 'failed', 'timeout', 'error')
+                    or (status not in ('completed', 'parked') and PARTIALS.get(download_folder, url))]
     
     if not pending_urls:
         print_info("No pending videos to download.")
@@ -425,46 +425,69 @@ def download_pending_videos(download_folder, video_status_map):
     total_success = 0
     total_fail = 0
     batch_num = 0
+    retries = {}    # url -> (retries so far, when the next one is due)
+    writer = StatusWriter(download_folder)
     
-    # Process in batches
-    for i in range(0, total_pending, BATCH_SIZE):
-        batch_num += 1
-        batch = pending_urls[i:i + BATCH_SIZE]
-        batch_end = min(i + BATCH_SIZE, total_pending)
-        
-        print_section(f"BATCH {batch_num} ({i + 1}-{batch_end} of {total_pending})")
-        
-        download_args = [(url, download_folder) for url in batch]
-        
-        batch_success = 0
-        batch_fail = 0
-        
-        with multiprocessing.Pool(processes=MAX_DOWNLOAD_WORKERS) as pool:
-            results = pool.imap_unordered(download_single_video, download_args)
+    # Process in batches; retries are appended, so the list can grow
+    i = 0
+    try:
+        while i < len(pending_urls):
+            total_pending = len(pending_urls)
+            batch_num += 1
+            start, batch_end = i, min(i + BATCH_SIZE, total_pending)
+            batch = pending_urls[start:batch_end]
+            i = batch_end
+            
+            # Back off before trying failed videos again
+            wait = max((retries[url][1] for url in batch if url in retries), default=0) - time.time()
+            if wait > 0:
+                print_info(f"Waiting {wait:.0f}s before retrying failed videos...")
+                time.sleep(wait)
+            
+            print_section(f"BATCH {batch_num} ({start + 1}-{batch_end} of {total_pending})")
             
-            for j, result in enumerate(results, 1):
-                print_progress(j, len(batch), "Downloading")
+            download_args = [(url, download_folder) for url in batch]
+            
+            batch_success = 0
+            batch_fail = 0
+            
+            with multiprocessing.Pool(processes=MAX_DOWNLOAD_WORKERS) as pool:
+                results = pool.imap_unordered(download_single_video, download_args)
                 
-                if result[0] == 'success':
-                    batch_success += 1
-                else:
-                    batch_fail += 1
-        
-        print()  # New line after progress bar
-        print_success(f"Batch {batch_num} complete: {batch_success} succeeded, {batch_fail} failed")
-        
-        total_success += batch_success
-        total_fail += batch_fail
+                for j, result in enumerate(results, 1):
+                    print_progress(j, len(batch), "Downloading")
+                    
+                    status, video_url, failure = result
+                    status = writer.record(video_url, status, failure)
+                    if status == 'completed':
+                        batch_success += 1
+                    elif status == 'parked':
+                        batch_fail += 1
+                    else:
+                        count = retries.get(video_url, (0, 0))[0] + 1
+                        retries[video_url] = (count, time.time() + DOWNLOAD_RETRY_DELAY * 2 ** (count - 1))
+                        pending_urls.append(video_url)
+            
+            print()  # New line after progress bar
+            retrying = len(batch) - batch_success - batch_fail
+            print_success(f"Batch {batch_num} complete: {batch_success} succeeded, {batch_fail} failed"
+                          + (f", {retrying} to retry" if retrying else ""))
+            
+            total_success += batch_success
+            total_fail += batch_fail
+            
+            # If there are more batches, ask to continue
+            remaining = len(pending_urls) - batch_end
+            if remaining > 0:
+                print()
+                print_info(f"{remaining} videos remaining")
+                choice = input("  Continue to next batch? (Y/n): ").strip().lower()
+                if choice == 'n':
+                    print_info("Stopping. Run again to resume.")
+                    break
         
-        # If there are more batches, ask to continue
-        remaining = total_pending - batch_end
-        if remaining > 0:
-            print()
-            print_info(f"{remaining} videos remaining")
-            choice = input("  Continue to next batch? (Y/n): ").strip().lower()
-            if choice == 'n':
-                print_info("Stopping. Run again to resume.")
-                break
+    finally:
+        writer.close()
     
     print()
     print_success(f"Session totals: {total_success} succeeded, {total_fail} failed")
@@ -718,10 +741,12 @@ def main():
     final_statuses = load_video_statuses(download_folder)
     completed = sum(1 for s in final_statuses.values() if s == 'completed')
     failed = sum(1 for s in final_statuses.values() if s in ('failed', 'error', 'timeout'))
+    parked = sum(1 for s in final_statuses.values() if s == 'parked')
     pending = sum(1 for s in final_statuses.values() if s == 'pending')
     
     print(f"  ✅ Completed: {completed}")
     print(f"  ❌ Failed:    {failed}")
+    print(f"  ⛔ Parked:    {parked}")
     print(f"  ⏳ Pending:   {pending}")
     print()
     print_info(f"Videos saved to: {download_folder}")